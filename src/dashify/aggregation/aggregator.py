@@ -1,22 +1,30 @@
 from typing import List, Dict
 from pandas import DataFrame
 import numpy as np
+from dashify.visualization.data_model.ragged_array import RaggedArray
 
 
 class DataAggregator:
-    def __init__(self, experiments_df: DataFrame, smoothing: float=0.0):
+    # "ema": TensorBoard-style exponential moving average, "moving_average": trailing mean,
+    # "gaussian": centered gaussian kernel. The smoothing factor in [0, 1) sets the width of all kernels.
+    supported_kernels = ["ema", "moving_average", "gaussian"]
+
+    def __init__(self, experiments_df: DataFrame, smoothing: float=0.0, smoothing_kernel: str = "ema"):
         self.experiments_df = experiments_df
         self.smoothing = smoothing
+        self.smoothing_kernel = smoothing_kernel
 
     def group_by_param(self, metric_tag: str, group_by_params: List[str]) -> Dict:
         df = self.experiments_df.copy()
         for param in group_by_params:
             df[param] = df[param].apply(str)
+        # all series of the metric are smoothed at once, the groups take their rows by position
+        smoothed = DataAggregator.smooth_batch(RaggedArray.from_series(df[metric_tag].values), self.smoothing,
+                                               self.smoothing_kernel)
         grouped = df.groupby(group_by_params)
         grouped_dict = {}
-        for param_name, param_group in grouped:
-            data_series = param_group[metric_tag].values.tolist()
-            data = [DataAggregator.smooth(data, self.smoothing) if isinstance(data, list) else [] for data in data_series]
+        for param_name, positions in sorted(grouped.indices.items()):
+            data = [smoothed[position].tolist() for position in positions]
             group_name = self._pretty_name(group_by_params, param_name)
             grouped_dict[group_name] = data
         return grouped_dict
@@ -41,4 +49,86 @@ class DataAggregator:
             smoothed.append(smoothed_val)
             last = smoothed_val
 
-        return smoothed
\ No newline at end of file
+        return smoothed
+
+    @staticmethod
+    def smooth_batch(series: RaggedArray, weight: float, kernel: str = "ema") -> RaggedArray:
+        """
+        Smooths all series at once on a padded matrix, i.e., the work per time step is vectorized across series.
+        :param series: Series of one metric, e.g., across all experiments
+        :param weight: Smoothing factor in [0, 1), 0 disables smoothing
+        :param kernel: One of `supported_kernels`. "ema" gives exactly the same values as `smooth`.
+        :return: Smoothed series with the same lengths
+        """
+        if kernel not in DataAggregator.supported_kernels:
+            raise Exception(f"Unknown smoothing kernel {kernel}, supported kernels: {DataAggregator.supported_kernels}")
+        if weight <= 0 or len(series.values) == 0:
+            return series
+        matrix, mask = series.to_padded(fill_value=0.0)
+        lengths = series.lengths
+        if kernel == "ema":
+            smoothed = DataAggregator._ema(matrix, weight)
+        else:
+            # windows longer than twice the longest series do not change the result anymore
+            window = min(DataAggregator.get_window_size(weight), 2 * matrix.shape[1] + 1)
+            # non-finite values (e.g., a diverged loss) do not contribute to the windows of their neighbours
+            finite = mask & np.isfinite(matrix)
+            values = np.where(finite, matrix, 0.0)
+            if kernel == "moving_average":
+                smoothed = DataAggregator._moving_average(values, finite, window)
+            else:
+                smoothed = DataAggregator._gaussian(values, finite, window)
+        # series with a single value are never smoothed (see `smooth`)
+        smoothed[lengths <= 1] = matrix[lengths <= 1]
+        return RaggedArray(smoothed[mask], series.offsets)
+
+    @staticmethod
+    def get_window_size(weight: float) -> int:
+        """
+        Window size of the moving average and gaussian kernels with the same center of mass as an EMA
+        with the given weight, i.e., (1 + weight) / (1 - weight).
+        """
+        return max(1, int(round((1 + weight) / max(1 - weight, 1e-6))))
+
+    @staticmethod
+    def _ema(matrix: np.ndarray, weight: float) -> np.ndarray:
+        # linear recurrence y[t] = weight * y[t - 1] + (1 - weight) * x[t] with y[-1] = x[0], evaluated with the
+        # same floating point operations as `smooth`
+        smoothed = np.empty_like(matrix)
+        last = matrix[:, 0]
+        for t in range(matrix.shape[1]):
+            last = last * weight + (1 - weight) * matrix[:, t]
+            smoothed[:, t] = last
+        return smoothed
+
+    @staticmethod
+    def _moving_average(matrix: np.ndarray, mask: np.ndarray, window: int) -> np.ndarray:
+        # trailing mean over the valid values among the last `window` values, the first values average over the
+        # values seen so far. Windows without any valid value are NaN.
+        cumulative = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+        counts = np.zeros((matrix.shape[0], matrix.shape[1] + 1))
+        np.cumsum(matrix, axis=1, out=cumulative[:, 1:])
+        np.cumsum(mask, axis=1, out=counts[:, 1:])
+        ends = np.arange(1, matrix.shape[1] + 1)
+        starts = np.maximum(ends - window, 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (cumulative[:, ends] - cumulative[:, starts]) / (counts[:, ends] - counts[:, starts])
+
+    @staticmethod
+    def _gaussian(matrix: np.ndarray, mask: np.ndarray, window: int) -> np.ndarray:
+        # centered gaussian with standard deviation (window - 1) / 2, renormalized by the weights of the valid values,
+        # i.e., at the borders of each series and around non-finite values. Both convolutions are computed for all
+        # rows at once via FFT, hence `matrix` must be zero where `mask` is False.
+        sigma = max((window - 1) / 2, 1e-6)
+        radius = int(np.ceil(3 * sigma))
+        kernel = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+        size = matrix.shape[1] + len(kernel) - 1
+        kernel_fft = np.fft.rfft(kernel, n=size)
+        values = np.fft.irfft(np.fft.rfft(matrix, n=size, axis=1) * kernel_fft, n=size, axis=1)
+        weights = np.fft.irfft(np.fft.rfft(mask.astype(np.float64), n=size, axis=1) * kernel_fft, n=size, axis=1)
+        values = values[:, radius:radius + matrix.shape[1]]
+        weights = weights[:, radius:radius + matrix.shape[1]]
+        # windows without any valid value only hold round-off errors of the FFT
+        weights[weights < 1e-9] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return values / weights
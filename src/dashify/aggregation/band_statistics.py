@@ -0,0 +1,127 @@
+from typing import List, Tuple, Union
+import warnings
+import numpy as np
+from dashify.visualization.data_model.ragged_array import RaggedArray
+
+
+class BandStatistics:
+    """
+    Computes the center line and the band of a group of series at each step. All band types are batched
+    reductions over a padded matrix (one row per series), where steps after the end of a series and NaN values
+    are masked out.
+
+    Band types:
+    - `std`: mean +- standard deviation
+    - `median_iqr`: median and interquartile range
+    - `quantile_<lower>_<upper>`: median and arbitrary percentiles, e.g., `quantile_5_95`
+    - `min_max`: mean and the envelope of all series
+    - `bootstrap_ci`: mean and the 95% bootstrap confidence interval of the mean
+    """
+    supported_band_types = ["std", "median_iqr", "quantile_10_90", "quantile_5_95", "min_max", "bootstrap_ci"]
+    # number of bootstrap resamples of the series and the confidence level of the bootstrap interval
+    bootstrap_samples = 200
+    bootstrap_confidence = 0.95
+    # number of steps processed at once when bootstrapping, bounds the memory to samples x chunk size
+    bootstrap_chunk_size = 4096
+
+    @staticmethod
+    def compute(series: Union[List, RaggedArray], band_type: str = "std") -> \
+            Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param series: List of series of different lengths or a `RaggedArray`
+        :param band_type: See class docstring
+        :return: center, lower bound, upper bound and the number of contributing series at each step
+        """
+        if not isinstance(series, RaggedArray):
+            series = RaggedArray.from_series(series)
+        matrix, mask = series.to_padded(fill_value=np.nan)
+        mask &= ~np.isnan(matrix)
+        counts = mask.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+            # steps without any value result in NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            if band_type == "std":
+                center, lower, upper = BandStatistics._std(matrix, mask, counts)
+            elif band_type == "median_iqr":
+                center, lower, upper = BandStatistics._quantiles(matrix, 25, 75)
+            elif band_type.startswith("quantile_"):
+                lower_percentile, upper_percentile = BandStatistics.parse_quantile_band_type(band_type)
+                center, lower, upper = BandStatistics._quantiles(matrix, lower_percentile, upper_percentile)
+            elif band_type == "min_max":
+                center, lower, upper = np.nanmean(matrix, axis=0), np.nanmin(matrix, axis=0), np.nanmax(matrix, axis=0)
+            elif band_type == "bootstrap_ci":
+                center, lower, upper = BandStatistics._bootstrap_ci(matrix, mask)
+            else:
+                raise Exception(f"Unknown band type {band_type}, supported band types: "
+                                f"{BandStatistics.supported_band_types}")
+        return center, lower, upper, counts
+
+    @staticmethod
+    def parse_quantile_band_type(band_type: str) -> Tuple[float, float]:
+        """
+        :return: (lower, upper) percentiles of a band type `quantile_<lower>_<upper>`
+        """
+        try:
+            _, lower, upper = band_type.split("_")
+            lower, upper = float(lower), float(upper)
+        except ValueError:
+            raise Exception(f"Invalid quantile band type {band_type}, expected quantile_<lower>_<upper>")
+        if not 0 <= lower <= upper <= 100:
+            raise Exception(f"Invalid quantile band type {band_type}, percentiles must be within [0, 100]")
+        return lower, upper
+
+    @staticmethod
+    def _std(matrix: np.ndarray, mask: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        values = np.where(mask, matrix, 0.0)
+        mean = values.sum(axis=0) / counts
+        std = np.sqrt((np.where(mask, values - mean, 0.0) ** 2).sum(axis=0) / counts)
+        return mean, mean - std, mean + std
+
+    @staticmethod
+    def _quantiles(matrix: np.ndarray, lower_percentile: float, upper_percentile: float) -> \
+            Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        lower, center, upper = BandStatistics._nan_percentiles(matrix, [lower_percentile, 50, upper_percentile])
+        return center, lower, upper
+
+    @staticmethod
+    def _bootstrap_ci(matrix: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # each resample is a vector of multiplicities of the series, hence the resampled means of all steps are
+        # two matrix products. The generator is seeded, such that the band does not flicker between refreshes.
+        n_series = matrix.shape[0]
+        generator = np.random.default_rng(0)
+        multiplicities = generator.multinomial(n_series, np.full(n_series, 1 / n_series),
+                                               size=BandStatistics.bootstrap_samples).astype(np.float64)
+        values = np.where(mask, matrix, 0.0)
+        weights = mask.astype(np.float64)
+        mean = values.sum(axis=0) / weights.sum(axis=0)
+        alpha = (1 - BandStatistics.bootstrap_confidence) / 2 * 100
+        lower, upper = np.empty_like(mean), np.empty_like(mean)
+        for start in range(0, matrix.shape[1], BandStatistics.bootstrap_chunk_size):
+            end = start + BandStatistics.bootstrap_chunk_size
+            resampled_means = (multiplicities @ values[:, start:end]) / (multiplicities @ weights[:, start:end])
+            lower[start:end], upper[start:end] = BandStatistics._nan_percentiles(resampled_means, [alpha, 100 - alpha])
+        return mean, lower, upper
+
+    @staticmethod
+    def _nan_percentiles(matrix: np.ndarray, percentiles: List[float]) -> List[np.ndarray]:
+        """
+        Same as `np.nanpercentile(matrix, percentiles, axis=0)` with linear interpolation, but vectorized across
+        the columns: NaNs are sorted to the end of each column, such that each percentile is an interpolation
+        between two gathered entries.
+        """
+        ordered = np.sort(matrix, axis=0)
+        counts = (~np.isnan(matrix)).sum(axis=0)
+        columns = np.arange(matrix.shape[1])
+        results = []
+        for percentile in percentiles:
+            positions = np.maximum(counts - 1, 0) * (percentile / 100)
+            below = np.floor(positions).astype(np.int64)
+            above = np.minimum(below + 1, np.maximum(counts - 1, 0))
+            fraction = positions - below
+            lower_values, upper_values = ordered[below, columns], ordered[above, columns]
+            values = lower_values + (upper_values - lower_values) * fraction
+            # exact entries where no interpolation is needed, avoids inf - inf
+            values = np.where(fraction == 0, lower_values, values)
+            values[counts == 0] = np.nan
+            results.append(values)
+        return results
@@ -0,0 +1,90 @@
+from typing import Dict, List
+from urllib.parse import quote, unquote
+import os
+import shutil
+import numpy as np
+
+
+class BinaryMetricsStore:
+    """
+    Columnar binary storage of the metrics of an experiment. Each metric is stored as a contiguous array of
+    little-endian float64 values in `metrics_bin/<url-encoded metric key>.f64`, which takes 8 bytes per value and
+    can be read without parsing, e.g., memory-mapped via `np.memmap`.
+
+    Writing `values` at `measurement_id` overwrites the series from `measurement_id` on (or appends to it if
+    `measurement_id` is beyond its end). In contrast to the JSON metrics, only numeric values can be stored.
+    """
+    folder_name = "metrics_bin"
+    file_extension = ".f64"
+    dtype = np.dtype("<f8")
+
+    @staticmethod
+    def exists(experiment_folder: str) -> bool:
+        return os.path.isdir(os.path.join(experiment_folder, BinaryMetricsStore.folder_name))
+
+    @staticmethod
+    def reset(experiment_folder: str):
+        """
+        Removes all binary metrics of an experiment, e.g., when the experiment is created anew.
+        """
+        folder = os.path.join(experiment_folder, BinaryMetricsStore.folder_name)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+
+    @staticmethod
+    def get_metric_path(experiment_folder: str, metric_key: str) -> str:
+        file_name = quote(metric_key, safe="") + BinaryMetricsStore.file_extension
+        return os.path.join(experiment_folder, BinaryMetricsStore.folder_name, file_name)
+
+    @staticmethod
+    def get_metric_keys(experiment_folder: str) -> List[str]:
+        folder = os.path.join(experiment_folder, BinaryMetricsStore.folder_name)
+        if not os.path.isdir(folder):
+            return []
+        extension = BinaryMetricsStore.file_extension
+        return [unquote(file_name[:-len(extension)]) for file_name in sorted(os.listdir(folder))
+                if file_name.endswith(extension)]
+
+    @staticmethod
+    def write(experiment_folder: str, metrics: Dict[str, List[float]], measurement_id: int):
+        """
+        Writes the values of each metric to its file, starting at `measurement_id`.
+        :param experiment_folder: Path to the experiment
+        :param metrics: Dictionary mapping metric keys to lists of numeric values
+        :param measurement_id: Measurement id of the captured metrics
+        """
+        os.makedirs(os.path.join(experiment_folder, BinaryMetricsStore.folder_name), exist_ok=True)
+        for key, values in metrics.items():
+            data = np.asarray(values, dtype=BinaryMetricsStore.dtype)
+            metric_path = BinaryMetricsStore.get_metric_path(experiment_folder, key)
+            with open(metric_path, "r+b" if os.path.exists(metric_path) else "w+b") as f:
+                length = f.seek(0, os.SEEK_END) // BinaryMetricsStore.dtype.itemsize
+                f.seek(min(measurement_id, length) * BinaryMetricsStore.dtype.itemsize)
+                f.write(data.tobytes())
+
+    @staticmethod
+    def load_metric(experiment_folder: str, metric_key: str, mmap: bool = False) -> np.ndarray:
+        """
+        Reads the series of a single metric.
+        :param mmap: If True, the file is memory-mapped read-only, such that values are only paged in when accessed.
+                     Each mapped series holds an open file descriptor until it is garbage collected, hence mapping
+                     is only suitable for a few series at a time, not for whole grid searches.
+        """
+        metric_path = BinaryMetricsStore.get_metric_path(experiment_folder, metric_key)
+        length = os.path.getsize(metric_path) // BinaryMetricsStore.dtype.itemsize
+        if length == 0:
+            return np.empty(0, dtype=BinaryMetricsStore.dtype)
+        if mmap:
+            return np.memmap(metric_path, dtype=BinaryMetricsStore.dtype, mode="r", shape=(length,))
+        return np.fromfile(metric_path, dtype=BinaryMetricsStore.dtype, count=length)
+
+    @staticmethod
+    def load(experiment_folder: str, mmap: bool = False, metric_keys: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Reads all metrics of an experiment.
+        :param metric_keys: If given, only these metrics are read
+        :return: Dictionary mapping metric keys to their series
+        """
+        return {key: BinaryMetricsStore.load_metric(experiment_folder, key, mmap=mmap)
+                for key in BinaryMetricsStore.get_metric_keys(experiment_folder)
+                if metric_keys is None or key in metric_keys}
@@ -0,0 +1,136 @@
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+
+class BufferedFileWriter:
+    """
+    Queues appends to files in memory and writes them from a background thread in batches.
+
+    A batch is written as soon as `flush_size` appends are pending or `flush_interval` seconds have passed since
+    the last flush, whatever comes first. All appends to the same file are written with a single `open` call and
+    in the order they were queued. Files can also be replaced as a whole, in which case only the latest content
+    queued for a file is written (after the appends of the same batch). Pending appends are written on `flush()`, `close()`, when leaving the context
+    manager (also in case of an exception) and at interpreter exit.
+    """
+
+    def __init__(self, flush_size: int = 1000, flush_interval: float = 5.0):
+        """
+        :param flush_size: Number of pending appends that triggers a flush
+        :param flush_interval: Maximum time in seconds that an append stays in memory
+        """
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._closed = False
+        self._init_process_state()
+        atexit.register(self.close)
+
+    def _init_process_state(self):
+        # threads and locks do not survive a fork, hence each process gets its own.
+        self._pid = os.getpid()
+        self._buffer: Dict[str, List[str]] = OrderedDict()
+        self._replacements: Dict[str, str] = OrderedDict()
+        self._num_pending = 0
+        self._buffer_condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _ensure_process(self):
+        if self._pid != os.getpid():
+            self._init_process_state()
+
+    def append(self, path: str, text: str):
+        """
+        Queues `text` to be appended to the file at `path`.
+        """
+        if self._closed:
+            raise Exception("Writer has already been closed.")
+        self._ensure_process()
+        with self._buffer_condition:
+            self._buffer.setdefault(path, []).append(text)
+            self._num_pending += 1
+            if self._num_pending >= self.flush_size:
+                self._buffer_condition.notify()
+
+    def replace(self, path: str, text: str):
+        """
+        Queues the file at `path` to be replaced by `text`. Replaces previously queued content for the same file.
+        """
+        if self._closed:
+            raise Exception("Writer has already been closed.")
+        self._ensure_process()
+        with self._buffer_condition:
+            if path not in self._replacements:
+                self._num_pending += 1
+            self._replacements[path] = text
+            if self._num_pending >= self.flush_size:
+                self._buffer_condition.notify()
+
+    def flush(self):
+        """
+        Writes all pending appends to disk. Blocks until they are written.
+        Errors that occurred in the background thread are re-raised here.
+        """
+        self._ensure_process()
+        self._write_pending()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def close(self):
+        """
+        Flushes all pending appends and stops the background thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._pid != os.getpid():
+            # the pending appends belong to the parent process which flushes them itself
+            return
+        with self._buffer_condition:
+            self._buffer_condition.notify()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            with self._buffer_condition:
+                self._buffer_condition.wait_for(lambda: self._closed or self._num_pending >= self.flush_size,
+                                                timeout=self.flush_interval)
+            try:
+                self._write_pending()
+            except Exception as e:
+                self._error = e
+
+    def _write_pending(self):
+        # the write lock guarantees that batches are written in the order they were taken from the buffer
+        with self._write_lock:
+            with self._buffer_condition:
+                buffer, self._buffer = self._buffer, OrderedDict()
+                replacements, self._replacements = self._replacements, OrderedDict()
+                self._num_pending = 0
+            for path, texts in buffer.items():
+                with open(path, "a") as f:
+                    f.write("".join(texts))
+            for path, text in replacements.items():
+                BufferedFileWriter.write_atomically(path, text)
+
+    @staticmethod
+    def write_atomically(path: str, text: str):
+        """
+        Writes `text` to a temporary file next to `path` and moves it in place afterwards.
+        """
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
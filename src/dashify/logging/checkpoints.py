@@ -0,0 +1,241 @@
+from typing import Any, Dict, List, Set, Callable
+import copy
+import os
+import re
+import queue
+import threading
+import torch
+import dill as dill
+from dashify.logging.metrics_log import MetricsLog
+
+
+class CheckpointIO:
+    """
+    Static helpers for writing checkpoints to disk.
+    """
+
+    @staticmethod
+    def snapshot(obj: Any) -> Any:
+        """
+        Creates a copy of a (nested) state dict that is decoupled from training, i.e., all tensors are detached and
+        copied to the CPU. Once the snapshot is taken, training may continue to modify the parameters.
+        :param obj: state dict, or any nesting of dicts, lists and tuples
+        :return: the snapshot
+        """
+        if isinstance(obj, torch.Tensor):
+            return obj.detach().to("cpu", copy=True)
+        elif isinstance(obj, dict):
+            snapshot = type(obj)((key, CheckpointIO.snapshot(value)) for key, value in obj.items())
+            if hasattr(obj, "_metadata"):  # version information of `nn.Module.state_dict()`
+                snapshot._metadata = copy.deepcopy(obj._metadata)
+            return snapshot
+        elif isinstance(obj, tuple) and hasattr(obj, "_fields"):  # named tuple
+            return type(obj)(*[CheckpointIO.snapshot(value) for value in obj])
+        elif isinstance(obj, (list, tuple)):
+            return type(obj)(CheckpointIO.snapshot(value) for value in obj)
+        return copy.deepcopy(obj)
+
+    @staticmethod
+    def save_atomically(obj: Any, path: str):
+        """
+        Serializes `obj` to a temporary file next to `path` and moves it in place afterwards, such that `path`
+        either holds the complete checkpoint or does not exist, even if the process dies while writing.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)  # creates intermediate folders
+        tmp_path = path + ".tmp"
+        torch.save(obj, tmp_path, pickle_module=dill)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str, mmap: bool = False) -> Any:
+        """
+        Loads a checkpoint.
+        :param path: Path to the checkpoint
+        :param mmap: If True, the checkpoint file is memory-mapped and loaded onto the CPU, such that the data of a
+                     tensor is only read from disk when the tensor is accessed. Checkpoints in the legacy
+                     (pre zip) serialization format cannot be memory-mapped and are loaded fully instead.
+        :return: the loaded checkpoint
+        """
+        if mmap:
+            try:
+                return torch.load(path, mmap=True, map_location="cpu")
+            except RuntimeError:
+                pass  # legacy format
+        return torch.load(path)
+
+    @staticmethod
+    def inspect(path: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Lists the tensors of a checkpoint together with their shapes and data types without reading the tensor data.
+        Keys of nested dicts and lists are joined by `/`, e.g., `state/0/exp_avg` for an optimizer state dict.
+        :param path: Path to the checkpoint
+        :return: Dictionary mapping each tensor key to `{"shape": [...], "dtype": "..."}`
+        """
+        checkpoint = CheckpointIO.load(path, mmap=True)
+        return CheckpointIO._collect_tensor_infos(checkpoint, parent_key="")
+
+    @staticmethod
+    def _collect_tensor_infos(obj: Any, parent_key: str) -> Dict[str, Dict[str, Any]]:
+        if isinstance(obj, torch.Tensor):
+            return {parent_key: {"shape": list(obj.shape), "dtype": str(obj.dtype)}}
+        if isinstance(obj, dict):
+            items = obj.items()
+        elif isinstance(obj, (list, tuple)):
+            items = enumerate(obj)
+        else:
+            return {}
+        infos = {}
+        for key, value in items:
+            new_key = f"{parent_key}/{key}" if parent_key else str(key)
+            infos.update(CheckpointIO._collect_tensor_infos(value, new_key))
+        return infos
+
+
+class RetentionPolicy:
+    """
+    Decides which checkpoints of a kind (e.g., `model`) are kept. A checkpoint is deleted if it is kept by none of the
+    configured policies.
+    """
+    requires_metrics = False
+
+    def select(self, measurement_ids: List[int], metrics: Dict[str, List[Any]]) -> Set[int]:
+        """
+        :param measurement_ids: Sorted measurement ids of the existing checkpoints
+        :param metrics: Metrics of the experiment (only loaded if `requires_metrics` is True)
+        :return: Measurement ids of the checkpoints to keep
+        """
+        raise NotImplementedError
+
+
+class KeepLastN(RetentionPolicy):
+    def __init__(self, n: int):
+        self.n = n
+
+    def select(self, measurement_ids: List[int], metrics: Dict[str, List[Any]]) -> Set[int]:
+        return set(measurement_ids[-self.n:]) if self.n > 0 else set()
+
+
+class KeepEveryM(RetentionPolicy):
+    def __init__(self, m: int):
+        self.m = m
+
+    def select(self, measurement_ids: List[int], metrics: Dict[str, List[Any]]) -> Set[int]:
+        return {measurement_id for measurement_id in measurement_ids if measurement_id % self.m == 0}
+
+
+class KeepBestK(RetentionPolicy):
+    """
+    Keeps the `k` checkpoints with the best value of a logged metric, where the checkpoint with measurement id `i`
+    is rated by `metrics[metric_key][i]`. Checkpoints without a logged value (yet) are kept.
+    """
+    requires_metrics = True
+
+    def __init__(self, metric_key: str, k: int, mode: str = "min"):
+        """
+        :param metric_key: Key of the metric, e.g., `val/loss`
+        :param k: Number of checkpoints to keep
+        :param mode: `min` if lower metric values are better, `max` otherwise
+        """
+        if mode not in ["min", "max"]:
+            raise Exception(f"Unknown mode {mode}. Supported modes: min, max")
+        self.metric_key = metric_key
+        self.k = k
+        self.mode = mode
+
+    def select(self, measurement_ids: List[int], metrics: Dict[str, List[Any]]) -> Set[int]:
+        series = metrics.get(self.metric_key, [])
+        rated = [measurement_id for measurement_id in measurement_ids if measurement_id < len(series)]
+        unrated = set(measurement_ids) - set(rated)
+        rated = sorted(rated, key=lambda measurement_id: series[measurement_id], reverse=self.mode == "max")
+        return set(rated[:self.k]) | unrated
+
+
+class CheckpointPruner:
+    """
+    Deletes the checkpoints `<name>_<measurement_id>.pt` of an experiment that are kept by none of the policies.
+    """
+
+    @staticmethod
+    def get_measurement_ids(checkpoint_folder: str, name: str) -> List[int]:
+        pattern = re.compile(re.escape(name) + r"_(\d+)\.pt$")
+        if not os.path.isdir(checkpoint_folder):
+            return []
+        matches = [pattern.match(file_name) for file_name in os.listdir(checkpoint_folder)]
+        return sorted(int(match.group(1)) for match in matches if match is not None)
+
+    @staticmethod
+    def prune(experiment_folder: str, checkpoint_folder: str, name: str, policies: List[RetentionPolicy]) -> List[int]:
+        """
+        :param experiment_folder: Path to the experiment, used to load the metrics if required by a policy
+        :param checkpoint_folder: Folder that contains the checkpoints
+        :param name: Name of the checkpoints, e.g., model or optimizer
+        :param policies: Retention policies
+        :return: Measurement ids of the deleted checkpoints
+        """
+        measurement_ids = CheckpointPruner.get_measurement_ids(checkpoint_folder, name)
+        metrics = MetricsLog.load(experiment_folder) if any(p.requires_metrics for p in policies) else {}
+        kept = set()
+        for policy in policies:
+            kept |= policy.select(measurement_ids, metrics)
+        deleted = [measurement_id for measurement_id in measurement_ids if measurement_id not in kept]
+        for measurement_id in deleted:
+            try:
+                os.remove(os.path.join(checkpoint_folder, f"{name}_{measurement_id}.pt"))
+            except FileNotFoundError:
+                pass  # already pruned by another process
+        return deleted
+
+
+class AsyncCheckpointWriter:
+    """
+    Writes checkpoints from a background thread. The caller only blocks for taking a CPU snapshot of the state dict
+    and, if `max_in_flight` tasks are already waiting, until one of them is done.
+    Other checkpoint related tasks, such as pruning, are executed by the same thread in submission order.
+    """
+
+    def __init__(self, max_in_flight: int = 2):
+        """
+        :param max_in_flight: Maximum number of tasks (e.g., snapshots) that are kept in memory while waiting
+        """
+        self._pid = os.getpid()
+        self._queue = queue.Queue(maxsize=max_in_flight)
+        self._errors = []
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def pid(self) -> int:
+        return self._pid
+
+    def submit(self, state_dict: Any, path: str):
+        """
+        Snapshots `state_dict` and queues it to be written to `path`.
+        """
+        snapshot = CheckpointIO.snapshot(state_dict)
+        self.submit_task(lambda: CheckpointIO.save_atomically(snapshot, path))
+
+    def submit_task(self, task: Callable[[], Any]):
+        """
+        Queues a callable to be executed by the background thread.
+        """
+        self._queue.put(task)
+
+    def wait(self):
+        """
+        Blocks until all queued checkpoints are written to disk and all other tasks are done.
+        Errors that occurred in the background thread are re-raised here.
+        """
+        self._queue.join()
+        if self._errors:
+            error, self._errors = self._errors[0], []
+            raise error
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            try:
+                task()
+            except Exception as e:
+                self._errors.append(e)
+            finally:
+                self._queue.task_done()
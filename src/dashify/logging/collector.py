@@ -0,0 +1,212 @@
+from typing import Union, Tuple
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from dashify.logging.buffered_writer import BufferedFileWriter
+
+logger = logging.getLogger(__name__)
+
+# either the path of a UNIX socket or a (host, port) tuple
+Address = Union[str, Tuple[str, int]]
+
+
+class MetricsCollector:
+    """
+    Local service that receives file writes from many logging processes and writes them to disk with a single
+    writer, batched via a `BufferedFileWriter`. This avoids that hundreds of workers open and write small files
+    under the same `log_dir` concurrently.
+
+    The protocol is line based: each message is a JSON object `{"op": "append" | "replace", "path": ..., "text": ...}`
+    terminated by a newline. The message `{"op": "flush"}` writes all pending data and is acknowledged with `ok`.
+    Only paths inside of `log_dir` are written, invalid messages are logged and skipped.
+    """
+
+    def __init__(self, address: Address, log_dir: str, flush_size: int = 1000, flush_interval: float = 1.0):
+        """
+        :param address: Path of a UNIX socket or (host, port) tuple, e.g., ("127.0.0.1", 7777)
+        :param log_dir: Root directory of all files that are written, i.e., the log dir of the workers
+        :param flush_size: Number of pending writes that triggers a flush
+        :param flush_interval: Maximum time in seconds that a write stays in memory
+        """
+        self.address = address
+        self.log_dir = os.path.realpath(log_dir)
+        self.writer = BufferedFileWriter(flush_size=flush_size, flush_interval=flush_interval)
+        collector = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    response = collector.handle_message(line)
+                    if response is not None:
+                        self.wfile.write(response)
+                        self.wfile.flush()
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)  # stale socket of a previous collector
+            self.server = socketserver.ThreadingUnixStreamServer(address, Handler)
+        else:
+            self.server = socketserver.ThreadingTCPServer(address, Handler)
+        self.server.daemon_threads = True
+
+    def handle_message(self, line: bytes):
+        try:
+            message = json.loads(line)
+            op = message["op"]
+            if op in ("append", "replace"):
+                path, text = message["path"], message["text"]
+                if not isinstance(path, str) or not isinstance(text, str):
+                    raise TypeError("path and text must be strings")
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping invalid message ({e}): {line[:200]!r}")
+            return None
+        if op in ("append", "replace") and not self.is_in_log_dir(path):
+            logger.warning(f"Skipping {op} of {path}, which is outside of the log dir {self.log_dir}")
+            return None
+        if op == "append":
+            self.writer.append(path, text)
+        elif op == "replace":
+            self.writer.replace(path, text)
+        elif op == "flush":
+            self.writer.flush()
+            return b"ok\n"
+        else:
+            logger.warning(f"Unknown operation {op}")
+        return None
+
+    def is_in_log_dir(self, path: str) -> bool:
+        """
+        Checks that a path lies inside of the log dir after resolving symbolic links and `..`.
+        """
+        path = os.path.realpath(path)
+        return os.path.isabs(path) and os.path.commonpath([self.log_dir, path]) == self.log_dir
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.writer.close()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+
+    def start(self) -> threading.Thread:
+        """
+        Serves from a background thread of the calling process.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.server.shutdown()
+
+
+class CollectorClient:
+    """
+    Sends file writes to a `MetricsCollector`. All methods return False if the collector is not reachable,
+    such that the caller can fall back to writing the file directly.
+    """
+
+    def __init__(self, address: Address, timeout: float = 10.0, retry_interval: float = 5.0):
+        """
+        :param address: Path of the collector's UNIX socket or (host, port) tuple
+        :param timeout: Timeout in seconds of the socket operations
+        :param retry_interval: Minimum time in seconds between two connection attempts, such that an unreachable
+                               collector does not slow down every single write
+        """
+        self.address = address
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._socket = None
+        self._pid = None
+        self._next_retry = 0.0
+        self._lock = threading.Lock()
+
+    def connect(self) -> bool:
+        if time.monotonic() < self._next_retry:
+            return False
+        try:
+            family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address)
+        except OSError as e:
+            logger.warning(f"Metrics collector at {self.address} is not reachable ({e}), writing files directly.")
+            self._socket = None
+            self._next_retry = time.monotonic() + self.retry_interval
+            return False
+        self._socket = sock
+        self._pid = os.getpid()
+        return True
+
+    @property
+    def is_connected(self) -> bool:
+        # a socket inherited from the parent process must not be shared
+        return self._socket is not None and self._pid == os.getpid()
+
+    def append(self, path: str, text: str) -> bool:
+        return self._send({"op": "append", "path": os.path.abspath(path), "text": text})
+
+    def replace(self, path: str, text: str) -> bool:
+        return self._send({"op": "replace", "path": os.path.abspath(path), "text": text})
+
+    def flush(self) -> bool:
+        """
+        Blocks until the collector has written all data received so far.
+        """
+        with self._lock:
+            if not self._send_unlocked({"op": "flush"}):
+                return False
+            try:
+                return self._socket.makefile("rb").readline() == b"ok\n"
+            except OSError:
+                self._disconnect()
+                return False
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+    def _send(self, message) -> bool:
+        with self._lock:
+            return self._send_unlocked(message)
+
+    def _send_unlocked(self, message) -> bool:
+        if not self.is_connected and not self.connect():
+            return False
+        try:
+            self._socket.sendall((json.dumps(message) + "\n").encode("utf-8"))
+            return True
+        except OSError as e:
+            logger.warning(f"Lost connection to metrics collector at {self.address} ({e}), writing files directly.")
+            self._disconnect()
+            return False
+
+    def _disconnect(self):
+        if self._socket is not None and self._pid == os.getpid():
+            self._socket.close()
+        self._socket = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Collects metrics of many logging processes and writes them to disk')
+    parser.add_argument('--socket', type=str, help='Path of the UNIX socket to listen on')
+    parser.add_argument('--port', type=int, help='Port on localhost to listen on')
+    parser.add_argument('--log_dir', type=str, required=True, help='Root directory of all files that are written')
+    parser.add_argument('--flush_interval', type=float, help='Maximum time in seconds a write is buffered', default=1.0)
+    args = parser.parse_args()
+    if not args.socket and not args.port:
+        raise Exception("Please specify either the socket with --socket <path> or the port with --port <port>")
+    address = args.socket if args.socket else ("127.0.0.1", args.port)
+    return address, args.log_dir, args.flush_interval
+
+
+if __name__ == '__main__':
+    address, log_dir, flush_interval = parse_args()
+    MetricsCollector(address, log_dir, flush_interval=flush_interval).serve_forever()
@@ -1,53 +1,17 @@
-from multiprocessing import Lock
 from typing import Dict, Any, List
 import os
 import json
-import torch
-import torch.nn as nn
-from torch.optim.optimizer import Optimizer
 import sys
-from contextlib import redirect_stderr, redirect_stdout
+from contextlib import redirect_stderr, redirect_stdout, contextmanager
 import traceback
 from functools import wraps
-import dill as dill
-
-
-class ResourceLocker:
-    __instance = None
-
-    @classmethod
-    def get_locker(cls):
-        if ResourceLocker.__instance is None:
-            ResourceLocker()
-        return ResourceLocker.__instance
-
-    def __init__(self):
-        """ Virtually private constructor. """
-        if ResourceLocker.__instance is not None:
-            raise Exception("This class is a singleton!")
-        else:
-            ResourceLocker.__instance = self
-            self.resource_access = {}
-            self.internal_lock = Lock()
-
-    def acquire(self, resource):
-        print(f"Acquiring {resource}")
-        self.internal_lock.acquire()
-
-        if resource not in self.resource_access:
-            self.resource_access[resource] = Lock()
-        self.internal_lock.release()
-        lock = self.resource_access[resource]
-        lock.acquire()
-
-    def release(self, resource):
-        self.internal_lock.acquire()
-
-        if resource not in self.resource_access:
-            self.resource_access[resource] = Lock()
-        self.internal_lock.release()
-        lock = self.resource_access[resource]
-        lock.release()
+from dashify.logging.metrics_log import MetricsLog
+from dashify.logging.metrics_summary import MetricsSummary
+from dashify.logging.binary_metrics import BinaryMetricsStore
+from dashify.logging.buffered_writer import BufferedFileWriter
+from dashify.logging.collector import CollectorClient, Address
+from dashify.logging.locking import ResourceLocker, ShardedFile
+from dashify.logging.checkpoints import CheckpointIO, AsyncCheckpointWriter, CheckpointPruner, RetentionPolicy
 
 
 class ExperimentInfo:
@@ -111,9 +75,20 @@ class ExperimentInfo:
 class DashifyLogger:
     config_name = "config.json"
     metrics_name = "metrics.json"
+    metrics_log_name = MetricsLog.log_name
+    summary_name = MetricsSummary.file_name
+    # on-disc format of the metrics: "json" (append-only JSON log) or "binary" (float64 arrays, see BinaryMetricsStore)
+    metrics_format = "json"
     checkpoint_folder = "checkpoints"
     std_out_name = "stdout.txt"
     err_out_name = "errout.txt"
+    # how files that are shared between workers are written: "lock" (file lock) or "shard" (one file per writer)
+    shared_write_mode = "lock"
+    _buffered_writer: BufferedFileWriter = None
+    _checkpoint_writer: AsyncCheckpointWriter = None
+    _collector_client: CollectorClient = None
+    # running metric summaries of the experiments logged by this process (experiment folder -> summary)
+    _summaries: Dict[str, Dict[str, Any]] = {}
 
     @classmethod
     def get_experiment_info(cls, log_dir: str, subfolder_id: str, model_name: str, dataset_name: str, run_id: str) -> ExperimentInfo:
@@ -125,6 +100,9 @@ class DashifyLogger:
         experiment_info.create_folder_structure()
         cls._create_experiment_file(experiment_info, cls.config_name)
         cls._create_experiment_file(experiment_info, cls.metrics_name)
+        MetricsLog.reset(experiment_info.full_experiment_path)
+        BinaryMetricsStore.reset(experiment_info.full_experiment_path)
+        cls._reset_summary(experiment_info.full_experiment_path)
         # std_out_path = os.path.join(experiment_info.full_experiment_path, cls.std_out_name)
         # err_out_path = os.path.join(experiment_info.full_experiment_path, cls.err_out_name)
         # sys.stdout = open(std_out_path, 'w')
@@ -158,15 +136,19 @@ class DashifyLogger:
     def log_raw_experiment_message(cls, file_name: str, config: Dict[str, Any], experiment_info: ExperimentInfo):
         experiment_folder = experiment_info.full_experiment_path
         dict_path = os.path.join(experiment_folder, file_name)
-        with open(dict_path, "a") as f:
-            json.dump(config, f)
+        cls._append_to_file(dict_path, json.dumps(config))
 
     @classmethod
     def log_raw_gs_message(cls, file_name: str, config: Dict[str, Any], experiment_info: ExperimentInfo):
         experiment_folder = experiment_info.full_experiment_path
         dict_path = os.path.join(experiment_folder, file_name)
-        with open(dict_path, "a") as f:
-            json.dump(config, f)
+        cls._append_to_shared_file(dict_path, json.dumps(config))
+
+    @classmethod
+    def read_shared_file(cls, file_path: str) -> str:
+        """ Reads a file that was written via `_append_to_shared_file`, including all of its shards.
+        """
+        return ShardedFile.read(file_path)
 
     @classmethod
     def load_dict(cls, file_name: str, experiment_info: ExperimentInfo) -> Dict[str, Any]:
@@ -177,38 +159,258 @@ class DashifyLogger:
         return d
 
     @classmethod
-    def save_checkpoint_state_dict(cls, state_dict: Dict, name: str, experiment_info: ExperimentInfo, measurement_id: int):
-        experiment_folder = experiment_info.full_experiment_path
-        state_dict_path = os.path.join(experiment_folder, cls.checkpoint_folder, name + "_" + str(measurement_id) + ".pt")
-        os.makedirs(os.path.dirname(state_dict_path), exist_ok=True)  # creates intermediate folders
-        torch.save(state_dict, state_dict_path, pickle_module=dill)
+    def save_checkpoint_state_dict(cls, state_dict: Dict, name: str, experiment_info: ExperimentInfo, measurement_id: int,
+                                   asynchronous: bool = False, max_in_flight: int = 2,
+                                   retention_policies: List[RetentionPolicy] = None):
+        """ Saves a checkpoint to `checkpoints/<name>_<measurement_id>.pt`. The checkpoint is written to a temporary
+        file first and moved in place afterwards.
+
+        :param state_dict: State dict to be saved
+        :param name: Name of the checkpoint, e.g., model or optimizer
+        :param experiment_info: Contains all necessary information to uniquely identify the experiment
+        :param measurement_id: Measurement id of the checkpoint. Generally, this is the epoch.
+        :param asynchronous: If True, the call only blocks for copying the state dict to the CPU. Serialization and
+                             writing happen in a background thread. Call `wait_for_checkpoints()` to make sure that
+                             all checkpoints are written.
+        :param max_in_flight: Maximum number of asynchronous checkpoints that wait to be written. If exceeded,
+                              the call blocks until a checkpoint is written.
+        :param retention_policies: If given, the checkpoints `<name>_*.pt` that are kept by none of the policies
+                                   (e.g., `KeepLastN(3)`, `KeepBestK("val/loss", 2)`) are deleted in the background
+                                   after this checkpoint is written.
+        """
+        state_dict_path = cls._get_checkpoint_path(name, experiment_info, measurement_id)
+        if asynchronous:
+            cls._get_checkpoint_writer(max_in_flight).submit(state_dict, state_dict_path)
+        else:
+            CheckpointIO.save_atomically(state_dict, state_dict_path)
+        if retention_policies:
+            checkpoint_folder = os.path.dirname(state_dict_path)
+            cls._get_checkpoint_writer(max_in_flight).submit_task(
+                lambda: CheckpointPruner.prune(experiment_info.full_experiment_path, checkpoint_folder, name,
+                                               retention_policies))
 
     @classmethod
-    def load_checkpoint_state_dict(cls, name: str, experiment_info: ExperimentInfo, measurement_id: int) -> Dict:
-        experiment_folder = experiment_info.full_experiment_path
-        state_dict_path = os.path.join(experiment_folder, cls.checkpoint_folder,
-                                       name + "_" + str(measurement_id) + ".pt")
-        state_dict = torch.load(state_dict_path)
+    def wait_for_checkpoints(cls):
+        """ Blocks until all asynchronously saved checkpoints are written to disc and pruning is done.
+        """
+        if cls._checkpoint_writer is not None and cls._checkpoint_writer.pid == os.getpid():
+            cls._checkpoint_writer.wait()
+
+    @classmethod
+    def load_checkpoint_state_dict(cls, name: str, experiment_info: ExperimentInfo, measurement_id: int,
+                                   mmap: bool = False) -> Dict:
+        """ Loads the checkpoint `checkpoints/<name>_<measurement_id>.pt`.
+
+        :param name: Name of the checkpoint, e.g., model or optimizer
+        :param experiment_info: Contains all necessary information to uniquely identify the experiment
+        :param measurement_id: Measurement id of the checkpoint. Generally, this is the epoch.
+        :param mmap: If True, the checkpoint is memory-mapped onto the CPU and tensor data is only read from disc
+                     when it is accessed.
+        """
+        state_dict_path = cls._get_checkpoint_path(name, experiment_info, measurement_id)
+        state_dict = CheckpointIO.load(state_dict_path, mmap=mmap)
         return state_dict
 
+    @classmethod
+    def inspect_checkpoint_state_dict(cls, name: str, experiment_info: ExperimentInfo,
+                                      measurement_id: int) -> Dict[str, Dict[str, Any]]:
+        """ Lists the tensors of a checkpoint with their shapes and data types without reading the tensor data.
+
+        :param name: Name of the checkpoint, e.g., model or optimizer
+        :param experiment_info: Contains all necessary information to uniquely identify the experiment
+        :param measurement_id: Measurement id of the checkpoint. Generally, this is the epoch.
+        :return: Dictionary mapping each tensor key to `{"shape": [...], "dtype": "..."}`
+        """
+        return CheckpointIO.inspect(cls._get_checkpoint_path(name, experiment_info, measurement_id))
+
     @classmethod
     def log_metrics(cls, metrics: Dict[str, List[float]], experiment_info: ExperimentInfo, measurement_id: int):
         """ Logs a metrics dictionary to disc.
 
+        The metrics are appended as a single record to `metrics.jsonl`, such that each call is O(1). For each key,
+        the values from `measurement_id` on are replaced when reading the metrics (last writer wins),
+        see `MetricsLog.merge_record`. Additionally, the summary statistics in `summary.json` are updated
+        incrementally. Only replacing already logged values requires recomputing the summary from all values.
+        If `metrics_format` is "binary", the (numeric) values are written to float64 arrays instead, where values
+        from `measurement_id` on are overwritten in place.
+
         :param metrics: Dictionary containing the metrics
         :param experiment_info: Contains all necessary information to uniquely identify the experiment
         :param measurement_id: Measurement id of the captures meatrics. Generally, this is the epoch.
         """
         experiment_folder = experiment_info.full_experiment_path
-        metrics_path = os.path.join(experiment_folder, cls.metrics_name)
-        with open(metrics_path, "r") as f:
-            stored_metrics = json.load(f)
-        merged_dict = DashifyLogger._merge_dictionaries(stored_metrics, metrics, measurement_id)
-        with open(metrics_path, "w") as f:
-            json.dump(merged_dict, f)
+        metrics_log_path = os.path.join(experiment_folder, cls.metrics_log_name)
+        summary, requires_recomputation = cls._get_summary(experiment_folder), False
+        for key, values in metrics.items():
+            if key not in summary:
+                summary[key] = MetricsSummary.from_series(values)
+            elif summary[key] is not None:
+                count = summary[key]["count"]
+                if measurement_id >= count and measurement_id + len(values) - 1 >= count:
+                    summary[key] = MetricsSummary.extend(summary[key], values)
+                else:
+                    requires_recomputation = True
+        if cls.metrics_format == "binary":
+            BinaryMetricsStore.write(experiment_folder, metrics, measurement_id)
+        else:
+            cls._append_to_file(metrics_log_path, MetricsLog.encode_record(metrics, measurement_id))
+        if requires_recomputation:
+            cls.flush()
+            summary = MetricsSummary.from_metrics(MetricsLog.load(experiment_folder))
+            cls._summaries[experiment_folder] = summary
+        cls._replace_file(os.path.join(experiment_folder, cls.summary_name), MetricsSummary.encode(summary))
+
+    @classmethod
+    def load_metrics(cls, experiment_info: ExperimentInfo) -> Dict[str, List[Any]]:
+        """ Loads the metrics dictionary of an experiment from disc.
+
+        :param experiment_info: Contains all necessary information to uniquely identify the experiment
+        :return: Dictionary mapping each metric key to its list of values
+        """
+        return MetricsLog.load(experiment_info.full_experiment_path)
+
+    # buffering
+
+    @classmethod
+    def enable_buffering(cls, flush_size: int = 1000, flush_interval: float = 5.0) -> BufferedFileWriter:
+        """ Queues all subsequent metrics and raw messages in memory and writes them from a background thread.
+
+        :param flush_size: Number of pending writes that triggers a flush
+        :param flush_interval: Maximum time in seconds that a write stays in memory
+        :return: the buffered writer
+        """
+        cls.disable_buffering()
+        cls._buffered_writer = BufferedFileWriter(flush_size=flush_size, flush_interval=flush_interval)
+        return cls._buffered_writer
+
+    @classmethod
+    def disable_buffering(cls):
+        """ Writes all pending messages to disc and switches back to synchronous writes.
+        """
+        if cls._buffered_writer is not None:
+            writer, cls._buffered_writer = cls._buffered_writer, None
+            writer.close()
+
+    @classmethod
+    def is_buffering(cls) -> bool:
+        return cls._buffered_writer is not None
+
+    @classmethod
+    def flush(cls):
+        """ Blocks until all pending messages are written to disc, including the messages sent to the collector.
+        Does nothing if neither buffering nor the collector is enabled.
+        """
+        if cls._collector_client is not None:
+            cls._collector_client.flush()
+        if cls._buffered_writer is not None:
+            cls._buffered_writer.flush()
+
+    @classmethod
+    @contextmanager
+    def buffered(cls, flush_size: int = 1000, flush_interval: float = 5.0):
+        """ Context manager that enables buffering and flushes all pending messages on exit, also on exceptions.
+
+        :param flush_size: Number of pending writes that triggers a flush
+        :param flush_interval: Maximum time in seconds that a write stays in memory
+        """
+        writer = cls.enable_buffering(flush_size=flush_size, flush_interval=flush_interval)
+        try:
+            yield writer
+        finally:
+            cls.disable_buffering()
+
+    # collector
+
+    @classmethod
+    def connect_collector(cls, address: Address) -> bool:
+        """ Sends all subsequent metrics and raw messages to a `MetricsCollector` (started, e.g., via
+        `python -m dashify.logging.collector --socket <path>`), which writes the files of all workers with a single
+        writer. Each process (e.g., a forked worker) opens its own connection. Whenever the collector is not
+        reachable, the messages are written directly (or buffered, if buffering is enabled) instead.
+
+        :param address: Path of the collector's UNIX socket or (host, port) tuple
+        :return: True if the collector is reachable
+        """
+        cls.disconnect_collector()
+        cls._collector_client = CollectorClient(address)
+        return cls._collector_client.connect()
+
+    @classmethod
+    def disconnect_collector(cls):
+        """ Waits until the collector has written all messages of this process and switches back to direct writes.
+        """
+        if cls._collector_client is not None:
+            client, cls._collector_client = cls._collector_client, None
+            client.flush()
+            client.close()
 
     # helper methods
 
+    @classmethod
+    def _append_to_file(cls, file_path: str, text: str):
+        if cls._collector_client is not None and cls._collector_client.append(file_path, text):
+            return
+        if cls._buffered_writer is not None:
+            cls._buffered_writer.append(file_path, text)
+        else:
+            with open(file_path, "a") as f:
+                f.write(text)
+
+    @classmethod
+    def _replace_file(cls, file_path: str, text: str):
+        if cls._collector_client is not None and cls._collector_client.replace(file_path, text):
+            return
+        if cls._buffered_writer is not None:
+            cls._buffered_writer.replace(file_path, text)
+        else:
+            BufferedFileWriter.write_atomically(file_path, text)
+
+    @classmethod
+    def _get_summary(cls, experiment_folder: str) -> Dict[str, Any]:
+        if experiment_folder not in cls._summaries:
+            # the stored summary might be outdated, e.g., if the experiment crashed while logging
+            cls.flush()
+            metrics = MetricsLog.load(experiment_folder)
+            summary = MetricsSummary.load(experiment_folder)
+            if summary is None or not MetricsSummary.is_consistent(summary, metrics):
+                summary = MetricsSummary.from_metrics(metrics)
+            cls._summaries[experiment_folder] = summary
+        return cls._summaries[experiment_folder]
+
+    @classmethod
+    def _reset_summary(cls, experiment_folder: str):
+        cls._summaries.pop(experiment_folder, None)
+        summary_path = os.path.join(experiment_folder, cls.summary_name)
+        if os.path.exists(summary_path):
+            os.remove(summary_path)
+
+    @classmethod
+    def _append_to_shared_file(cls, file_path: str, text: str):
+        if cls.shared_write_mode == "shard":
+            cls._append_to_file(ShardedFile.shard_path(file_path), text)
+        elif cls._collector_client is not None and cls._collector_client.append(file_path, text):
+            # the collector is the single writer of the file, hence no lock is needed
+            return
+        elif cls.shared_write_mode == "lock":
+            # written synchronously, since the lock must be held while writing
+            with ResourceLocker.get_locker().locked(file_path):
+                with open(file_path, "a") as f:
+                    f.write(text)
+        else:
+            raise Exception(f"Unknown shared write mode {cls.shared_write_mode}. Supported modes: lock, shard")
+
+    @classmethod
+    def _get_checkpoint_path(cls, name: str, experiment_info: ExperimentInfo, measurement_id: int) -> str:
+        experiment_folder = experiment_info.full_experiment_path
+        return os.path.join(experiment_folder, cls.checkpoint_folder, name + "_" + str(measurement_id) + ".pt")
+
+    @classmethod
+    def _get_checkpoint_writer(cls, max_in_flight: int) -> AsyncCheckpointWriter:
+        # the background thread of a parent process does not exist in forked children
+        if cls._checkpoint_writer is None or cls._checkpoint_writer.pid != os.getpid():
+            cls._checkpoint_writer = AsyncCheckpointWriter(max_in_flight=max_in_flight)
+        return cls._checkpoint_writer
+
     @classmethod
     def _create_experiment_file(cls, experiment_info: ExperimentInfo, file_name: str):
         full_path = os.path.join(experiment_info.full_experiment_path, file_name)
@@ -235,20 +437,39 @@ class DashifyLogger:
 
 
 class ExperimentTracking(object):
-    def __init__(self, experiment_info: ExperimentInfo, log_to_file: bool = False):
+    def __init__(self, experiment_info: ExperimentInfo, log_to_file: bool = False, buffered: bool = False):
+        """
+        :param experiment_info: Contains all necessary information to uniquely identify the experiment
+        :param log_to_file: Forwards `stdout` and `stderr` to files inside the experiment folder
+        :param buffered: Buffers all metrics and raw messages of the run in memory and writes them from
+                         a background thread (see `DashifyLogger.buffered`)
+        """
         self.log_to_file = log_to_file
+        self.buffered = buffered
         self.experiment_info = experiment_info
 
     def __call__(self, run_fun):
         @wraps(run_fun)
         def decorate_run(**fun_params: Dict[str, Any]):
-            if self.log_to_file:
-                self.redirect_function_output(run_fun, fun_params, self.experiment_info)
-            else:
-                self.run_fun_with_reraise(run_fun, fun_params, file=None)
+            try:
+                if self.buffered and not DashifyLogger.is_buffering():
+                    with DashifyLogger.buffered():
+                        self.run_tracked(run_fun, fun_params)
+                else:
+                    self.run_tracked(run_fun, fun_params)
+            finally:
+                # makes sure that all metrics and checkpoints of the run are on disc, also if the run failed
+                DashifyLogger.flush()
+                DashifyLogger.wait_for_checkpoints()
 
         return decorate_run
 
+    def run_tracked(self, run_fun, fun_params: Dict[str, Any]):
+        if self.log_to_file:
+            self.redirect_function_output(run_fun, fun_params, self.experiment_info)
+        else:
+            self.run_fun_with_reraise(run_fun, fun_params, file=None)
+
     def redirect_function_output(self, run_fun, fun_params: Dict[str, Any], experiment_info: ExperimentInfo):
         stdout_file = os.path.join(experiment_info.full_experiment_path, DashifyLogger.std_out_name)
         stderr_file = os.path.join(experiment_info.full_experiment_path, DashifyLogger.err_out_name)
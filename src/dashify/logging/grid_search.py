@@ -0,0 +1,158 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Callable, Tuple
+import itertools
+import json
+import multiprocessing as mp
+import os
+from dashify.logging.dashify_logging import DashifyLogger, ExperimentInfo, ExperimentTracking
+
+
+class GridSearch:
+    @staticmethod
+    def expand(param_grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Expands a parameter grid to the list of all configs, i.e., the cartesian product of all list values.
+        Nested dictionaries are expanded recursively, all other values are kept fixed.
+
+        Example: `{"lr": [0.1, 0.01], "model": {"layers": [1, 2]}, "seed": 0}` expands to four configs.
+        :param param_grid: Dictionary mapping each parameter to a list of values, a fixed value or a nested grid
+        :return: List of configs in a deterministic order
+        """
+        keys = list(param_grid.keys())
+        value_options = []
+        for key in keys:
+            value = param_grid[key]
+            if isinstance(value, dict):
+                value_options.append(GridSearch.expand(value))
+            elif isinstance(value, list):
+                value_options.append(value)
+            else:
+                value_options.append([value])
+        return [dict(zip(keys, values)) for values in itertools.product(*value_options)]
+
+
+class GridSearchRunner:
+    """
+    Runs a `run_fun` for every config of a parameter grid on a process pool.
+
+    Each run gets the run id of its config's position in the expanded grid and is executed via `ExperimentTracking`,
+    i.e., with its stdout and stderr written to files in its experiment folder (if `log_to_file` is True).
+    A failing run does not stop the grid search. Successful runs are marked as completed, such that a restarted grid
+    search (e.g., after a crash) skips them. Runs that were started but not completed are started from scratch in a
+    reset folder, unless `resume_incomplete` is set and `run_fun` picks up its metrics and checkpoints itself.
+    """
+    completed_marker_name = "completed"
+
+    def __init__(self, run_fun: Callable, param_grid: Dict[str, Any], log_dir: str, subfolder_id: str,
+                 model_name: str, dataset_name: str, num_workers: int = None, log_to_file: bool = True,
+                 resume: bool = True, resume_incomplete: bool = False, start_method: str = None,
+                 fun_params: Dict[str, Any] = None):
+        """
+        :param run_fun: Training function called as `run_fun(config=..., experiment_info=..., **fun_params)`.
+                        Must be picklable, i.e., defined at module level.
+        :param param_grid: Parameter grid, see `GridSearch.expand`
+        :param log_dir: directory where all grid search runs are stored
+        :param subfolder_id: id of the grid search, e.g., a time stamp
+        :param model_name: name of the model
+        :param dataset_name: name of the dataset
+        :param num_workers: Number of worker processes. Defaults to the number of CPUs. With 1, the runs are
+                            executed in the calling process.
+        :param log_to_file: Forwards each run's stdout and stderr to files inside its experiment folder
+        :param resume: If True, completed runs are skipped. Otherwise, all runs start from scratch.
+        :param resume_incomplete: If True, runs that were started with the same config but not completed keep their
+                                  folder (metrics, checkpoints) and `run_fun` is additionally called with
+                                  `resumed=True` (`resumed=False` for new runs). `run_fun` then needs to continue
+                                  logging after the already logged measurements. If False, incomplete runs are
+                                  reset, since rerunning from measurement 0 on top of the old metrics would mix up
+                                  the series of both attempts.
+        :param start_method: Start method of the worker processes (`fork`, `spawn`, `forkserver`)
+        :param fun_params: Additional keyword arguments passed to each call of `run_fun`, e.g., the device
+        """
+        self.run_fun = run_fun
+        self.param_grid = param_grid
+        self.log_dir = log_dir
+        self.subfolder_id = subfolder_id
+        self.model_name = model_name
+        self.dataset_name = dataset_name
+        self.num_workers = num_workers if num_workers is not None else mp.cpu_count()
+        self.log_to_file = log_to_file
+        self.resume = resume
+        self.resume_incomplete = resume_incomplete
+        self.start_method = start_method
+        self.fun_params = fun_params if fun_params is not None else {}
+
+    def get_runs(self) -> List[Tuple[ExperimentInfo, Dict[str, Any]]]:
+        configs = GridSearch.expand(self.param_grid)
+        return [(DashifyLogger.get_experiment_info(self.log_dir, self.subfolder_id, self.model_name,
+                                                   self.dataset_name, str(run_id)), config)
+                for run_id, config in enumerate(configs)]
+
+    def run(self) -> Dict[str, str]:
+        """
+        Executes all runs of the grid that are not completed yet.
+        :return: Dictionary mapping each run id to its status (`completed`, `skipped` or `failed`)
+        """
+        statuses = {}
+        pending = []
+        for experiment_info, config in self.get_runs():
+            if self.resume and GridSearchRunner.is_completed(experiment_info, config):
+                statuses[experiment_info.run_id] = "skipped"
+            else:
+                pending.append((experiment_info, config))
+
+        run_args = [(self.run_fun, experiment_info, config, self.fun_params, self.log_to_file,
+                     self.resume and self.resume_incomplete)
+                    for experiment_info, config in pending]
+        if self.num_workers == 1:
+            results = [GridSearchRunner._execute_run(*args) for args in run_args]
+        else:
+            mp_context = mp.get_context(self.start_method) if self.start_method is not None else None
+            with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=mp_context) as executor:
+                results = list(executor.map(GridSearchRunner._execute_run, *zip(*run_args))) if run_args else []
+        statuses.update(dict(results))
+        return dict(sorted(statuses.items(), key=lambda item: int(item[0])))
+
+    @staticmethod
+    def is_completed(experiment_info: ExperimentInfo, config: Dict[str, Any]) -> bool:
+        """
+        Checks if a run is marked as completed and was run with the same config.
+        """
+        marker_path = os.path.join(experiment_info.full_experiment_path, GridSearchRunner.completed_marker_name)
+        return os.path.exists(marker_path) and GridSearchRunner._has_config(experiment_info, config)
+
+    @staticmethod
+    def _has_config(experiment_info: ExperimentInfo, config: Dict[str, Any]) -> bool:
+        config_path = os.path.join(experiment_info.full_experiment_path, DashifyLogger.config_name)
+        if not os.path.exists(config_path):
+            return False
+        with open(config_path, "r") as f:
+            try:
+                stored_config = json.load(f)
+            except ValueError:
+                return False
+        # compare the json representations, e.g., tuples are stored as lists
+        return stored_config == json.loads(json.dumps(config))
+
+    @staticmethod
+    def _execute_run(run_fun: Callable, experiment_info: ExperimentInfo, config: Dict[str, Any],
+                     fun_params: Dict[str, Any], log_to_file: bool, resume_incomplete: bool):
+        marker_path = os.path.join(experiment_info.full_experiment_path, GridSearchRunner.completed_marker_name)
+        if os.path.exists(marker_path):
+            os.remove(marker_path)
+        resumed = resume_incomplete and GridSearchRunner._has_config(experiment_info, config)
+        if not resumed:
+            # truncates the metrics log, the binary metrics and the summary of a previous attempt
+            DashifyLogger.save_experiment_info(experiment_info)
+            DashifyLogger.save_config(config=config, experiment_info=experiment_info)
+        if resume_incomplete:
+            fun_params = dict(fun_params, resumed=resumed)
+
+        tracked_run_fun = ExperimentTracking(experiment_info=experiment_info, log_to_file=log_to_file)(run_fun)
+        try:
+            tracked_run_fun(config=config, experiment_info=experiment_info, **fun_params)
+        except Exception:
+            # the exception is already reported by ExperimentTracking, we only keep the grid search going
+            return experiment_info.run_id, "failed"
+        with open(marker_path, "w") as f:
+            f.write("")
+        return experiment_info.run_id, "completed"
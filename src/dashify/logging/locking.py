@@ -0,0 +1,193 @@
+from multiprocessing import Lock
+from contextlib import contextmanager
+from typing import Dict
+import glob
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessLockBackend:
+    """
+    Locks resources via `multiprocessing.Lock` objects. The locks are only shared with processes that are forked
+    from the process that created them, i.e., workers started independently (cluster scheduler, `spawn`-based pools)
+    are NOT mutually excluded.
+    """
+
+    def __init__(self):
+        self.resource_access = {}
+        self.internal_lock = Lock()
+
+    def _get_lock(self, resource: str):
+        self.internal_lock.acquire()
+        if resource not in self.resource_access:
+            self.resource_access[resource] = Lock()
+        self.internal_lock.release()
+        return self.resource_access[resource]
+
+    def acquire(self, resource: str):
+        self._get_lock(resource).acquire()
+
+    def release(self, resource: str):
+        self._get_lock(resource).release()
+
+
+class FileLockBackend:
+    """
+    Locks resources via `fcntl.flock` on lock files, which provides mutual exclusion between all processes
+    (and threads) on a machine, no matter how they were started. If the resource is a file path, the lock file
+    `<resource>.lock` is placed next to it, otherwise it is placed in `lock_dir`.
+    Note that `flock` is not reliable on some network filesystems. For many concurrent writers, prefer
+    writing to shard files (see `ShardedFile`).
+    """
+
+    def __init__(self, lock_dir: str = None):
+        if fcntl is None:
+            raise Exception("The file lock backend requires fcntl, which is not available on this platform.")
+        if lock_dir is None:
+            lock_dir = os.path.join(tempfile.gettempdir(), "dashify_locks")
+        self.lock_dir = lock_dir
+        # file descriptors of the held locks per thread, since flock locks are bound to the open file
+        self._held = threading.local()
+
+    def _lock_path(self, resource: str) -> str:
+        resource_dir = os.path.dirname(resource)
+        if resource_dir and os.path.isdir(resource_dir):
+            return resource + ".lock"
+        os.makedirs(self.lock_dir, exist_ok=True)
+        return os.path.join(self.lock_dir, resource.replace(os.sep, "_") + ".lock")
+
+    def _held_fds(self) -> Dict[str, int]:
+        if not hasattr(self._held, "fds"):
+            self._held.fds = {}
+        return self._held.fds
+
+    def acquire(self, resource: str):
+        fd = os.open(self._lock_path(resource), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except Exception:
+            os.close(fd)
+            raise
+        self._held_fds()[resource] = fd
+
+    def release(self, resource: str):
+        fd = self._held_fds().pop(resource)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class ResourceLocker:
+    """
+    Singleton that provides mutual exclusion for named resources (generally file paths).
+
+    The default backend locks via lock files (`FileLockBackend`), such that independently started workers are
+    mutually excluded as well. On platforms without `fcntl`, it falls back to `ProcessLockBackend`.
+    The time spent waiting for each resource is recorded and can be queried via `get_wait_statistics`.
+    """
+    __instance = None
+    backends = {"process": ProcessLockBackend, "file": FileLockBackend}
+
+    @classmethod
+    def get_locker(cls, backend: str = None):
+        """
+        :param backend: if given, switches the backend of the locker to `process` or `file`
+        """
+        if ResourceLocker.__instance is None:
+            ResourceLocker()
+        if backend is not None:
+            ResourceLocker.__instance.set_backend(backend)
+        return ResourceLocker.__instance
+
+    def __init__(self):
+        """ Virtually private constructor. """
+        if ResourceLocker.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            ResourceLocker.__instance = self
+            self.backend_name = "file" if fcntl is not None else "process"
+            self.backend = ResourceLocker.backends[self.backend_name]()
+            self.wait_statistics: Dict[str, Dict[str, float]] = {}
+            self._statistics_lock = threading.Lock()
+
+    def set_backend(self, backend: str, **backend_params):
+        if backend not in ResourceLocker.backends:
+            raise Exception(f"Unknown lock backend {backend}. Supported backends: {list(ResourceLocker.backends)}")
+        if backend != self.backend_name or backend_params:
+            self.backend_name = backend
+            self.backend = ResourceLocker.backends[backend](**backend_params)
+
+    def acquire(self, resource):
+        start = time.perf_counter()
+        self.backend.acquire(resource)
+        wait_time = time.perf_counter() - start
+        self._record_wait_time(resource, wait_time)
+        logger.debug(f"Acquired {resource} after {wait_time * 1000:.3f} ms")
+
+    def release(self, resource):
+        self.backend.release(resource)
+
+    @contextmanager
+    def locked(self, resource):
+        self.acquire(resource)
+        try:
+            yield
+        finally:
+            self.release(resource)
+
+    def get_wait_statistics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns for each resource the number of acquisitions as well as the total and maximum wait time in seconds.
+        """
+        with self._statistics_lock:
+            return {resource: stats.copy() for resource, stats in self.wait_statistics.items()}
+
+    def reset_wait_statistics(self):
+        with self._statistics_lock:
+            self.wait_statistics = {}
+
+    def _record_wait_time(self, resource, wait_time: float):
+        with self._statistics_lock:
+            stats = self.wait_statistics.setdefault(resource, {"count": 0, "total_wait": 0.0, "max_wait": 0.0})
+            stats["count"] += 1
+            stats["total_wait"] += wait_time
+            stats["max_wait"] = max(stats["max_wait"], wait_time)
+
+
+class ShardedFile:
+    """
+    Lock-free alternative to writing a shared file from many workers: each writer (host and process) appends to its
+    own shard file `<path>.shard-<host>-<pid>`, and readers concatenate all shards.
+    """
+
+    @staticmethod
+    def shard_path(path: str) -> str:
+        return f"{path}.shard-{socket.gethostname()}-{os.getpid()}"
+
+    @staticmethod
+    def get_shard_paths(path: str):
+        return sorted(glob.glob(glob.escape(path) + ".shard-*"))
+
+    @staticmethod
+    def read(path: str) -> str:
+        """
+        Reads the content of the file at `path` (if it exists), followed by the content of all of its shards.
+        """
+        paths = ([path] if os.path.exists(path) else []) + ShardedFile.get_shard_paths(path)
+        contents = []
+        for shard_path in paths:
+            with open(shard_path, "r") as f:
+                contents.append(f.read())
+        return "".join(contents)
@@ -0,0 +1,144 @@
+import json
+import os
+from typing import Dict, List, Any, Iterable, Tuple
+from dashify.logging.binary_metrics import BinaryMetricsStore
+from dashify.logging.partial_json import MetricsJsonReader
+
+
+class MetricsLog:
+    """
+    Append-only on-disk representation of the metrics of an experiment.
+
+    Each call to `DashifyLogger.log_metrics` appends a single JSON line of the form
+    `{"measurement_id": <int>, "metrics": {<metric_key>: [<values>]}}` to `metrics.jsonl`, such that logging
+    costs O(1) w.r.t. the length of the experiment's history. When reading, the records are replayed in order
+    on top of the (legacy) `metrics.json` dictionary, i.e. the last writer wins.
+    """
+    log_name = "metrics.jsonl"
+    legacy_name = "metrics.json"
+
+    @staticmethod
+    def encode_record(metrics: Dict[str, List[Any]], measurement_id: int) -> str:
+        """
+        Serializes a single metrics update to one line of the log.
+        :param metrics: Dictionary containing the metrics
+        :param measurement_id: Measurement id of the captured metrics
+        :return: JSON line terminated by a newline
+        """
+        return json.dumps({"measurement_id": measurement_id, "metrics": metrics}) + "\n"
+
+    @staticmethod
+    def reset(experiment_folder: str):
+        """
+        Removes the log of an experiment, e.g., when the experiment is created anew.
+        """
+        log_path = os.path.join(experiment_folder, MetricsLog.log_name)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+
+    @staticmethod
+    def read_records(log_path: str) -> Iterable[Tuple[int, Dict[str, List[Any]]]]:
+        """
+        Yields the (measurement_id, metrics) records of a log file in the order they were written.
+        A truncated last line (e.g., the process was killed while writing) is skipped.
+        """
+        with open(log_path, "r") as f:
+            lines = f.readlines()
+        return MetricsLog.parse_records(lines)
+
+    @staticmethod
+    def parse_records(lines: List[str]) -> Iterable[Tuple[int, Dict[str, List[Any]]]]:
+        """
+        Yields the (measurement_id, metrics) records of the lines of a log, e.g., read from an archive.
+        """
+        for line_number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if line_number == len(lines) - 1:
+                    break
+                raise
+            yield record["measurement_id"], record["metrics"]
+
+    @staticmethod
+    def merge_record(stored_metrics: Dict[str, List[Any]], metrics: Dict[str, List[Any]], measurement_id: int) -> \
+            Dict[str, List[Any]]:
+        """
+        Merges a single record into `stored_metrics` (in place) with the same semantics as
+        `DashifyLogger._merge_dictionaries`. Appending to the end of a series, which is by far the most common
+        case, does not copy the series.
+        :param stored_metrics: Dictionary mapping metric keys to their series
+        :param metrics: Metrics of the record
+        :param measurement_id: Measurement id of the record
+        :return: stored_metrics
+        """
+        for key, values in metrics.items():
+            series = stored_metrics.get(key)
+            if series is None:
+                stored_metrics[key] = list(values)
+            elif measurement_id >= len(series) and measurement_id + len(values) - 1 >= len(series):
+                series.extend(values)
+            else:
+                stored_metrics[key] = series[:measurement_id] + values + series[measurement_id + len(values) - 1:]
+        return stored_metrics
+
+    @staticmethod
+    def load(experiment_folder: str, mmap: bool = False, metric_keys: List[str] = None,
+             use_offset_index: bool = False) -> Dict[str, List[Any]]:
+        """
+        Loads the metrics of an experiment folder by replaying `metrics.jsonl` on top of `metrics.json`.
+        Folders that were logged with older versions of dashify only contain `metrics.json`.
+        Metrics that are stored in the binary format (see `BinaryMetricsStore`) are added as numpy arrays.
+        :param experiment_folder: Path to the experiment
+        :param mmap: If True, binary metrics are memory-mapped instead of being read into memory
+        :param metric_keys: If given, only these metrics are loaded and only their values are parsed from
+                            `metrics.json` (see `MetricsJsonReader`)
+        :param use_offset_index: If True, the values of `metric_keys` are read via the byte-offset index of
+                                 `metrics.json`, which is built on first use
+        :return: Dictionary mapping metric keys to their series
+        """
+        stored_metrics = MetricsLog._load_json_metrics(experiment_folder, metric_keys, use_offset_index)
+        if BinaryMetricsStore.exists(experiment_folder):
+            stored_metrics.update(BinaryMetricsStore.load(experiment_folder, mmap=mmap, metric_keys=metric_keys))
+        return stored_metrics
+
+    @staticmethod
+    def get_keys(experiment_folder: str, use_offset_index: bool = False) -> List[str]:
+        """
+        Lists the metric keys of an experiment folder without parsing the series of `metrics.json` or the
+        binary metrics. Only the records of `metrics.jsonl` are parsed.
+        :param experiment_folder: Path to the experiment
+        :param use_offset_index: If True, the keys of `metrics.json` are read from its byte-offset index
+        :return: Metric keys in the order in which `load` returns them
+        """
+        legacy_path = os.path.join(experiment_folder, MetricsLog.legacy_name)
+        log_path = os.path.join(experiment_folder, MetricsLog.log_name)
+        keys = {}
+        if os.path.exists(legacy_path):
+            keys.update(dict.fromkeys(MetricsJsonReader.get_keys(legacy_path, use_offset_index)))
+        if os.path.exists(log_path):
+            for _, metrics in MetricsLog.read_records(log_path):
+                keys.update(dict.fromkeys(metrics))
+        keys.update(dict.fromkeys(BinaryMetricsStore.get_metric_keys(experiment_folder)))
+        return list(keys)
+
+    @staticmethod
+    def _load_json_metrics(experiment_folder: str, metric_keys: List[str] = None,
+                           use_offset_index: bool = False) -> Dict[str, List[Any]]:
+        legacy_path = os.path.join(experiment_folder, MetricsLog.legacy_name)
+        log_path = os.path.join(experiment_folder, MetricsLog.log_name)
+        stored_metrics = {}
+        if os.path.exists(legacy_path):
+            if metric_keys is None:
+                with open(legacy_path, "r") as f:
+                    stored_metrics = json.load(f)
+            else:
+                stored_metrics = MetricsJsonReader.read_keys(legacy_path, metric_keys, use_offset_index)
+        if os.path.exists(log_path):
+            for measurement_id, metrics in MetricsLog.read_records(log_path):
+                if metric_keys is not None:
+                    metrics = {key: values for key, values in metrics.items() if key in metric_keys}
+                MetricsLog.merge_record(stored_metrics, metrics, measurement_id)
+        return stored_metrics
@@ -0,0 +1,114 @@
+import json
+import os
+from numbers import Number
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+
+class MetricsSummary:
+    """
+    Running summary statistics of the metrics of an experiment, stored in `summary.json` next to `metrics.json`.
+
+    For each metric key, the summary holds `count`, `sum`, `min`, `max`, `first`, `last`, `argmin` and `argmax`
+    of the series, such that aggregated views (e.g., the experiments table) do not need to load the full series.
+    Metrics with non-numeric values cannot be summarized and are mapped to `None`.
+    """
+    file_name = "summary.json"
+    supported_aggregations = ["min", "mean", "max", "first", "last"]
+
+    @staticmethod
+    def is_summarizable(values: List[Any]) -> bool:
+        return all(isinstance(value, Number) and not isinstance(value, bool) for value in values)
+
+    @staticmethod
+    def from_series(series: List[Any]) -> Optional[Dict[str, Any]]:
+        """
+        Computes the summary of a full series.
+        :param series: Values of the metric
+        :return: Summary entry or `None` if the series is not numeric
+        """
+        if isinstance(series, np.ndarray) and series.size > 0:
+            return {"count": int(series.size), "sum": float(series.sum()),
+                    "min": float(series.min()), "max": float(series.max()),
+                    "first": float(series[0]), "last": float(series[-1]),
+                    "argmin": int(series.argmin()), "argmax": int(series.argmax())}
+        if not MetricsSummary.is_summarizable(series):
+            return None
+        entry = {"count": 0, "sum": 0, "min": None, "max": None, "first": None, "last": None,
+                 "argmin": None, "argmax": None}
+        return MetricsSummary.extend(entry, series)
+
+    @staticmethod
+    def from_metrics(metrics: Dict[str, List[Any]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        return {key: MetricsSummary.from_series(series) for key, series in metrics.items()}
+
+    @staticmethod
+    def extend(entry: Dict[str, Any], values: List[Any]) -> Optional[Dict[str, Any]]:
+        """
+        Updates a summary entry (in place) with values that are appended to the end of the series.
+        :param entry: Summary entry of the series
+        :param values: Appended values
+        :return: The updated entry or `None` if the values are not numeric
+        """
+        if not MetricsSummary.is_summarizable(values):
+            return None
+        for value in values:
+            index = entry["count"]
+            if index == 0:
+                entry["first"] = value
+            if entry["min"] is None or value < entry["min"]:
+                entry["min"], entry["argmin"] = value, index
+            if entry["max"] is None or value > entry["max"]:
+                entry["max"], entry["argmax"] = value, index
+            entry["sum"] += value
+            entry["last"] = value
+            entry["count"] = index + 1
+        return entry
+
+    @staticmethod
+    def aggregate(entry: Optional[Dict[str, Any]], aggregation: str) -> Any:
+        """
+        Answers an aggregation (`min`, `mean`, `max`, `first`, `last`) from a summary entry.
+        """
+        if entry is None or entry["count"] == 0:
+            return None
+        if aggregation == "mean":
+            return entry["sum"] / entry["count"]
+        return entry[aggregation]
+
+    @staticmethod
+    def aggregate_series(series: List[Any], aggregation: str) -> Any:
+        """
+        Answers an aggregation directly from a series, e.g., for metrics that cannot be summarized.
+        """
+        if not isinstance(series, (list, np.ndarray)) or len(series) == 0:
+            return None
+        if aggregation == "first":
+            return series[0]
+        if aggregation == "last":
+            return series[-1]
+        return MetricsSummary.aggregate(MetricsSummary.from_series(series), aggregation)
+
+    @staticmethod
+    def encode(summary: Dict[str, Optional[Dict[str, Any]]]) -> str:
+        return json.dumps(summary)
+
+    @staticmethod
+    def load(experiment_folder: str) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+        """
+        :return: The stored summary of an experiment or `None` if the experiment has no summary (yet)
+        """
+        summary_path = os.path.join(experiment_folder, MetricsSummary.file_name)
+        if not os.path.exists(summary_path):
+            return None
+        with open(summary_path, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def is_consistent(summary: Dict[str, Optional[Dict[str, Any]]], metrics: Dict[str, List[Any]]) -> bool:
+        """
+        Checks that a stored summary covers exactly the given metrics, e.g., it is not outdated after a crash.
+        """
+        if set(summary.keys()) != set(metrics.keys()):
+            return False
+        return all(entry is None or entry["count"] == len(metrics[key]) for key, entry in summary.items())
@@ -0,0 +1,187 @@
+from typing import Dict, List, Any, Tuple, Iterable
+import json
+import mmap
+import os
+import re
+
+# structural characters that change the nesting inside of a JSON value
+_STRUCTURAL = re.compile(rb'["\[\]{}]')
+_SCALAR_END = re.compile(rb'[,}\]]')
+_NON_WHITESPACE = re.compile(rb'\S')
+
+
+class MetricsJsonReader:
+    """
+    Reads selected top-level keys of a (large) `metrics.json` file without parsing the whole document.
+
+    The file is memory-mapped and scanned for the byte ranges of the top-level values. Only the values of the
+    requested keys are parsed. Lists of numbers do not contain any structural characters, hence the scan jumps
+    from the start of a series straight to its end.
+
+    Optionally, the byte ranges are stored in the offset index `metrics.offsets.json` next to the metrics file,
+    such that later reads seek straight to the requested series. The offset index is only used as long as the
+    size and modification time of the metrics file match.
+    """
+    offsets_name = "metrics.offsets.json"
+
+    @staticmethod
+    def read_keys(metrics_path: str, metric_keys: Iterable[str], use_offset_index: bool = False) -> Dict[str, Any]:
+        """
+        Extracts the values of the given top-level keys.
+        :param metrics_path: Path to the JSON file
+        :param metric_keys: Keys to be extracted, keys that are not present in the file are ignored
+        :param use_offset_index: If True, the offset index is used (and built if missing or outdated)
+        :return: Dictionary mapping the present keys to their values in the order of the file
+        """
+        metric_keys = set(metric_keys)
+        if not metric_keys:
+            return {}
+        if use_offset_index:
+            offsets = MetricsJsonReader.get_offsets(metrics_path)
+            ranges = [(key, start, end) for key, (start, end) in offsets.items() if key in metric_keys]
+            values = {}
+            with open(metrics_path, "rb") as f:
+                for key, start, end in ranges:
+                    f.seek(start)
+                    values[key] = json.loads(f.read(end - start))
+            return values
+        with open(metrics_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                values = {}
+                for key, start, end in MetricsJsonReader._scan(buffer):
+                    if key in metric_keys:
+                        values[key] = json.loads(buffer[start:end])
+                        if len(values) == len(metric_keys):
+                            break  # the rest of the file is not needed
+                return values
+
+    @staticmethod
+    def get_keys(metrics_path: str, use_offset_index: bool = False) -> List[str]:
+        """
+        :return: The top-level keys of the file without parsing any of the values
+        """
+        if use_offset_index:
+            return list(MetricsJsonReader.get_offsets(metrics_path).keys())
+        return list(MetricsJsonReader.scan_offsets(metrics_path).keys())
+
+    @staticmethod
+    def scan_offsets(metrics_path: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Scans the file for the byte range [start, end) of each top-level value.
+        """
+        with open(metrics_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return {}
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return {key: (start, end) for key, start, end in MetricsJsonReader._scan(buffer)}
+
+    @staticmethod
+    def get_offsets(metrics_path: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Returns the byte ranges of the top-level values from the offset index. The offset index is (re)built if it
+        does not exist or the metrics file changed since it was built.
+        """
+        offsets_path = os.path.join(os.path.dirname(metrics_path), MetricsJsonReader.offsets_name)
+        stat = os.stat(metrics_path)
+        if os.path.exists(offsets_path):
+            try:
+                with open(offsets_path, "r") as f:
+                    stored = json.load(f)
+                if stored["size"] == stat.st_size and stored["mtime_ns"] == stat.st_mtime_ns:
+                    return {key: tuple(offset) for key, offset in stored["offsets"].items()}
+            except (ValueError, KeyError):
+                pass  # e.g., truncated offset index, it is rebuilt below
+        offsets = MetricsJsonReader.scan_offsets(metrics_path)
+        tmp_path = offsets_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "offsets": offsets}, f)
+            os.replace(tmp_path, offsets_path)
+        except OSError:
+            pass  # e.g., read-only log dir, the offsets are still valid for this read
+        return offsets
+
+    @staticmethod
+    def _scan(buffer) -> Iterable[Tuple[str, int, int]]:
+        """
+        Yields (key, start, end) of each top-level value of a JSON object.
+        """
+        position = MetricsJsonReader._skip_whitespace(buffer, 0)
+        if buffer[position:position + 1] != b"{":
+            raise ValueError("Expected a JSON object")
+        position += 1
+        while True:
+            position = MetricsJsonReader._skip_whitespace(buffer, position)
+            char = buffer[position:position + 1]
+            if char == b"}":
+                return
+            if char == b",":
+                position += 1
+                continue
+            key_end = MetricsJsonReader._skip_string(buffer, position)
+            key = json.loads(buffer[position:key_end])
+            position = MetricsJsonReader._skip_whitespace(buffer, key_end)
+            if buffer[position:position + 1] != b":":
+                raise ValueError(f"Expected ':' at byte {position}")
+            start = MetricsJsonReader._skip_whitespace(buffer, position + 1)
+            end = MetricsJsonReader._skip_value(buffer, start)
+            yield key, start, end
+            position = end
+
+    @staticmethod
+    def _skip_whitespace(buffer, position: int) -> int:
+        match = _NON_WHITESPACE.search(buffer, position)
+        if match is None:
+            raise ValueError("Unexpected end of JSON document")
+        return match.start()
+
+    @staticmethod
+    def _skip_string(buffer, position: int) -> int:
+        """
+        :param position: Position of the opening quote
+        :return: Position after the closing quote
+        """
+        end = position + 1
+        while True:
+            end = buffer.find(b'"', end)
+            if end < 0:
+                raise ValueError("Unterminated string")
+            backslashes = 0
+            while buffer[end - 1 - backslashes] == ord("\\"):
+                backslashes += 1
+            end += 1
+            if backslashes % 2 == 0:
+                return end
+
+    @staticmethod
+    def _skip_value(buffer, position: int) -> int:
+        """
+        :param position: Position of the first character of the value
+        :return: Position after the value
+        """
+        char = buffer[position:position + 1]
+        if char == b'"':
+            return MetricsJsonReader._skip_string(buffer, position)
+        if char not in (b"[", b"{"):
+            end = _SCALAR_END.search(buffer, position).start()
+            return len(buffer[position:end].rstrip()) + position
+        if char == b"[":
+            # fast path for flat lists, e.g., series of numbers, via plain byte searches
+            end = buffer.find(b"]", position)
+            if end >= 0 and all(buffer.find(nested, position + 1, end) < 0 for nested in (b"[", b"{", b'"')):
+                return end + 1
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(buffer, position)
+            if match is None:
+                raise ValueError("Unexpected end of JSON document")
+            char = match.group()
+            if char == b'"':
+                position = MetricsJsonReader._skip_string(buffer, match.start())
+                continue
+            position = match.end()
+            depth += 1 if char in (b"[", b"{") else -1
+            if depth == 0:
+                return position
@@ -15,22 +15,17 @@ class MetricDataProcessor:
         Gets data (un aggregated) for all experiments
         """
         smoothing = GraphController.get_smoothing_factor(session_id)
-        experiment_ids = ExperimentController.get_experiment_ids(session_id)
-        metric_data = ExperimentController.get_experiment_data_by_experiment_id(session_id, experiment_ids, [metric_tag])
-
-        def prepare_single_data_series(experiment_id: str) -> Dict:
-            data = metric_data[metric_data["experiment_id"] == experiment_id][metric_tag].values[0]
-            data = data if isinstance(data, list) else []
-            data = DataAggregator.smooth(data, smoothing)
-            dict_data = {
-                "experiment_id": experiment_id,
-                "data": data
-            }
-            return dict_data
+        smoothing_kernel = GraphController.get_smoothing_kernel(session_id)
+        columns = ExperimentController.get_experiment_columns(session_id, [metric_tag])
+        # all series are smoothed at once
+        metric_data = DataAggregator.smooth_batch(columns.get_metric(metric_tag), smoothing, smoothing_kernel)
 
         series = []
-        for experiment_id in tqdm(experiment_ids):
-            series.append(prepare_single_data_series(experiment_id))
+        for experiment_id, data in zip(tqdm(columns.experiment_ids), metric_data):
+            series.append({
+                "experiment_id": experiment_id,
+                "data": data.tolist()
+            })
 
         return series
 
@@ -41,11 +36,13 @@ class MetricDataProcessor:
         """
 
         def prepare_data(metric_tag: str) -> Dict:
-            aggregator = DataAggregator(experiments_df=metric_data_df, smoothing=smoothing)
+            aggregator = DataAggregator(experiments_df=metric_data_df, smoothing=smoothing,
+                                        smoothing_kernel=smoothing_kernel)
             data = aggregator.group_by_param(metric_tag, group_by_params)
             return data
 
         smoothing = GraphController.get_smoothing_factor(session_id)
+        smoothing_kernel = GraphController.get_smoothing_kernel(session_id)
         group_by_param_1 = MetricsController.get_metric_setting_by_metric_tag(session_id, metric_tag, "Grouping parameter 1")
         group_by_param_2 = MetricsController.get_metric_setting_by_metric_tag(session_id, metric_tag, "Grouping parameter 2")
         
@@ -1,15 +1,23 @@
-from dashify.visualization.data_import.data_loaders import LocalDataLoader
+from dashify.visualization.data_import.data_loaders import LocalDataLoader, ArchiveDataLoader
+from dashify.visualization.data_import.log_dir_watcher import LogDirWatcher
 import pandas as pd
 from typing import List, Dict, Optional
 from dashify.visualization.data_model.grid_search_result import GridSearchResult
+from dashify.aggregation.band_statistics import BandStatistics
 import os
 import functools
 
 
 class InMemoryCacheController:
-    def __init__(self, log_dir: str = None):
+    def __init__(self, log_dir: str = None, watch_log_dir: bool = True, refresh_seconds: float = 60):
         self.cache: Dict[str, Dict[str, SessionStorage]] = dict()
         self._log_dir = log_dir
+        # if True, changes under the log dir are tracked by a `LogDirWatcher` instead of rescanning on each reload
+        self.watch_log_dir = watch_log_dir
+        # time in seconds between two checks for changes of the graphs, while the log dir is watched. Each check
+        # that finds changes rebuilds all graphs of the session.
+        self.refresh_seconds = refresh_seconds
+        self.watcher: LogDirWatcher = None
 
     @property
     def log_dir(self) -> str:
@@ -19,6 +27,16 @@ class InMemoryCacheController:
     def log_dir(self, value: str):
         self._log_dir = value
 
+    def start_watcher(self):
+        """
+        Starts watching the log dir (if enabled), replacing the watcher of a previous log dir.
+        """
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.watch_log_dir and self.log_dir is not None:
+            self.watcher = LogDirWatcher(self.log_dir).start()
+
     def create_on_access(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -31,7 +49,12 @@ class InMemoryCacheController:
             self.cache[session_id] = dict()
 
         # reload grid search results from disk
-        gs_result = LocalDataLoader.get_grid_search_results(os.path.join(self.log_dir, grid_search_id))
+        watcher_version = self.watcher.get_version(grid_search_id) if self.watcher is not None else 0
+        gs_log_dir = os.path.join(self.log_dir, grid_search_id)
+        if ArchiveDataLoader.is_archive(gs_log_dir):
+            gs_result = ArchiveDataLoader.get_grid_search_results(gs_log_dir)
+        else:
+            gs_result = LocalDataLoader.get_grid_search_results(gs_log_dir)
         config_dict = {key: False for key in gs_result.get_flattened_experiment_configs()}
         config_settings = ConfigSettings(config_dict)
         metrics_settings = MetricsSettings(tracked_metrics=gs_result.get_experiment_metrics(),
@@ -43,6 +66,7 @@ class InMemoryCacheController:
                                                                 config_settings=config_settings,
                                                                 experiment_filters=experiment_filters,
                                                                 graph_settings=graph_settings)
+        self.cache[session_id][grid_search_id].watcher_version = watcher_version
         # self.activate_grid_search(session_id, grid_search_id)
 
     def get_activated_grid_search_id(self, session_id) -> Optional[str]:
@@ -62,11 +86,36 @@ class InMemoryCacheController:
     def get_gs_results(self, grid_search_id: str, session_id: str, reload=False) -> GridSearchResult:
         if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
             self.invalidate_cache(grid_search_id, session_id)
-        elif reload:
-            gs_result = LocalDataLoader.get_grid_search_results(os.path.join(self.log_dir, grid_search_id))
-            self.cache[session_id][grid_search_id].gridsearch_result = gs_result
+        elif reload and self.has_changes(grid_search_id, session_id):
+            # only experiments that changed on disk are reloaded
+            session_storage = self.cache[session_id][grid_search_id]
+            changed_experiment_ids = None
+            if self.watcher is not None:
+                watcher_version = self.watcher.get_version(grid_search_id)
+                changed_experiment_ids = self.watcher.get_changed_experiment_ids(grid_search_id,
+                                                                                 session_storage.watcher_version)
+                session_storage.watcher_version = watcher_version
+            if ArchiveDataLoader.is_archive(session_storage.gridsearch_result.gs_log_dir):
+                ArchiveDataLoader.update_grid_search_results(session_storage.gridsearch_result)
+            else:
+                LocalDataLoader.update_grid_search_results(session_storage.gridsearch_result,
+                                                           experiment_ids=changed_experiment_ids)
         return self.cache[session_id][grid_search_id].gridsearch_result
 
+    def has_changes(self, grid_search_id: str, session_id: str) -> bool:
+        """
+        Checks if the grid search changed on disk since the session's last reload. Without watcher, this is unknown
+        and hence always True.
+        """
+        if self.watcher is None or session_id not in self.cache or grid_search_id not in self.cache[session_id]:
+            return True
+        return self.watcher.get_version(grid_search_id) > self.cache[session_id][grid_search_id].watcher_version
+
+    def get_gridsearch_ids(self) -> List[str]:
+        if self.watcher is not None:
+            return self.watcher.get_grid_search_ids()
+        return LocalDataLoader.list_grid_search_ids(self.log_dir)
+
     def get_configs_settings(self, grid_search_id: str, session_id: str) -> List[str]:
         if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
             self.invalidate_cache(grid_search_id, session_id)
@@ -113,14 +162,37 @@ class InMemoryCacheController:
             self.invalidate_cache(grid_search_id, session_id)
         return self.cache[session_id][grid_search_id].graph_settings.smoothing_factor
 
+    def set_graph_smoothing_kernel(self, grid_search_id: str, session_id: str, smoothing_kernel: str):
+        if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
+            self.invalidate_cache(grid_search_id, session_id)
+        self.cache[session_id][grid_search_id].graph_settings.smoothing_kernel = smoothing_kernel
+
+    def get_graph_smoothing_kernel(self, grid_search_id: str, session_id: str) -> str:
+        if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
+            self.invalidate_cache(grid_search_id, session_id)
+        return self.cache[session_id][grid_search_id].graph_settings.smoothing_kernel
+
+    def set_graph_min_band_series(self, grid_search_id: str, session_id: str, min_band_series: int):
+        if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
+            self.invalidate_cache(grid_search_id, session_id)
+        self.cache[session_id][grid_search_id].graph_settings.min_band_series = min_band_series
+
+    def get_graph_min_band_series(self, grid_search_id: str, session_id: str) -> int:
+        if session_id not in self.cache or grid_search_id not in self.cache[session_id]:
+            self.invalidate_cache(grid_search_id, session_id)
+        return self.cache[session_id][grid_search_id].graph_settings.min_band_series
+
 
 #################################################################
 ##################### STUFF THAT WE CACHE #######################
 #################################################################
 
 class GraphSettings:
-    def __init__(self, smoothing_factor: float = 0):
+    def __init__(self, smoothing_factor: float = 0, smoothing_kernel: str = "ema", min_band_series: int = 1):
         self._smoothing_factor = smoothing_factor
+        self._smoothing_kernel = smoothing_kernel  # see `DataAggregator.supported_kernels`
+        # bands are only drawn at steps to which at least this many series contribute
+        self._min_band_series = min_band_series
 
     @property
     def smoothing_factor(self) -> float:
@@ -130,6 +202,22 @@ class GraphSettings:
     def smoothing_factor(self, value: float):
         self._smoothing_factor = value
 
+    @property
+    def smoothing_kernel(self) -> str:
+        return self._smoothing_kernel
+
+    @smoothing_kernel.setter
+    def smoothing_kernel(self, value: str):
+        self._smoothing_kernel = value
+
+    @property
+    def min_band_series(self) -> int:
+        return self._min_band_series
+
+    @min_band_series.setter
+    def min_band_series(self, value: int):
+        self._min_band_series = value
+
 
 class ConfigSettings:
     def __init__(self, config_dict: Dict[str, bool]):
@@ -148,6 +236,7 @@ class ConfigSettings:
 class MetricsSettings:
     _supported_aggregation_function = ["last", "min", "mean", "max", "first"]
     _supported_std_band_values = ["n", "y"]
+    _supported_band_types = BandStatistics.supported_band_types
     _supported_selected_band_values = ["n", "y"]
 
     def __init__(self, tracked_metrics: List[str], config_settings: ConfigSettings):
@@ -155,6 +244,7 @@ class MetricsSettings:
         self._metrics_settings_table["Selected"] = MetricsSettings._supported_selected_band_values[0]
         self._metrics_settings_table["Aggregation"] = MetricsSettings._supported_aggregation_function[0]
         self._metrics_settings_table["Std_band"] = MetricsSettings._supported_std_band_values[0]
+        self._metrics_settings_table["Band_type"] = MetricsSettings._supported_band_types[0]
         self._metrics_settings_table["Grouping parameter 1"] = config_settings.get_all()[0]
         self._metrics_settings_table["Grouping parameter 2"] = "None" # by default, let's make it to None
 
@@ -200,6 +290,7 @@ class SessionStorage:
         self._experiment_filters = experiment_filters
         self._graph_settings = graph_settings
         self._active = False  # determines if this session storage is currently visualized or not
+        self._watcher_version = 0  # version of the log dir watcher that the grid search result reflects
 
     @property
     def gridsearch_result(self) -> GridSearchResult:
@@ -245,6 +336,14 @@ class SessionStorage:
     def active(self) -> bool:
         return self._active
 
+    @property
+    def watcher_version(self) -> int:
+        return self._watcher_version
+
+    @watcher_version.setter
+    def watcher_version(self, value: int):
+        self._watcher_version = value
+
     @active.setter
     def active(self, value: bool):
         self._active = value
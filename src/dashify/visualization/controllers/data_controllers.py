@@ -1,11 +1,11 @@
 from dashify.visualization.controllers.cache_controller import cache_controller
 from dashify.visualization.controllers.cache_controller import ExperimentFilters
 import dashify.visualization.controllers.cell_data_types  as cell_data_types
+from dashify.visualization.data_model.grid_search_result import GridSearchResult
+from dashify.visualization.data_model.columnar_grid_search_result import ColumnarGridSearchResult
 
 import pandas as pd
 from typing import List, Tuple
-import numpy as np
-import os
 
 
 class GridSearchController:
@@ -17,12 +17,20 @@ class GridSearchController:
     def set_log_dir(log_dir: str, replace=False):
         if cache_controller.log_dir is None or replace:
             cache_controller.log_dir = log_dir
+            cache_controller.start_watcher()
             # TODO invalidate entire cache
 
+    @staticmethod
+    def is_watching_log_dir() -> bool:
+        return cache_controller.watcher is not None
+
+    @staticmethod
+    def get_refresh_seconds() -> float:
+        return cache_controller.refresh_seconds
+
     @staticmethod
     def get_gridsearch_ids():
-        log_dir = cache_controller.log_dir
-        return [name for name in os.listdir(log_dir) if os.path.isdir(os.path.join(log_dir, name))]
+        return cache_controller.get_gridsearch_ids()
 
     @staticmethod
     def get_activated_grid_search_id(session_id: str) -> str:
@@ -50,6 +58,26 @@ class GraphController:
         grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
         cache_controller.set_graph_smoothing_factor(grid_search_id, session_id, smoothing_factor)
 
+    @staticmethod
+    def get_smoothing_kernel(session_id: str) -> str:
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        return cache_controller.get_graph_smoothing_kernel(grid_search_id, session_id)
+
+    @staticmethod
+    def set_smoothing_kernel(session_id: str, smoothing_kernel: str):
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        cache_controller.set_graph_smoothing_kernel(grid_search_id, session_id, smoothing_kernel)
+
+    @staticmethod
+    def get_min_band_series(session_id: str) -> int:
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        return cache_controller.get_graph_min_band_series(grid_search_id, session_id)
+
+    @staticmethod
+    def set_min_band_series(session_id: str, min_band_series: int):
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        cache_controller.set_graph_min_band_series(grid_search_id, session_id, min_band_series)
+
 
 class MetricsController:
     @staticmethod
@@ -77,6 +105,16 @@ class MetricsController:
         settings_df = settings_df[settings_df["metrics"] == metric_tag]
         return settings_df.shape[0] > 0
 
+    @staticmethod
+    def get_band_type(session_id: str, metric_tag: str) -> str:
+        """
+        :return: Band type of the metric's band graph (see `BandStatistics`), `std` for settings imported from
+                 analysis files that were exported before band types existed
+        """
+        if "Band_type" not in MetricsController.get_metrics_settings(session_id).columns:
+            return "std"
+        return MetricsController.get_metric_setting_by_metric_tag(session_id, metric_tag, "Band_type")
+
     @staticmethod
     def get_metric_setting_by_metric_tag(session_id: str, metric_tag: str, setting_col) -> str:
         df_metrics = MetricsController.get_metrics_settings(session_id)
@@ -109,9 +147,8 @@ class ExperimentController:
         metrics_settings = cache_controller.get_metrics_settings(grid_search_id, session_id)
         config_cols = cache_controller.get_selected_configs_settings(grid_search_id, session_id)
         experiment_filters = cache_controller.get_experiment_filters(grid_search_id, session_id)
-        df_experiments = cache_controller.get_gs_results(grid_search_id, session_id,
-                                                         reload=reload).to_pandas_dataframe()
-        return ExperimentController._process_experiments_df(df_experiments=df_experiments,
+        gs_result = cache_controller.get_gs_results(grid_search_id, session_id, reload=reload)
+        return ExperimentController._process_experiments_df(gs_result=gs_result,
                                                             config_cols=config_cols + ["experiment_id"],
                                                             metrics_settings=metrics_settings,
                                                             experiment_filters=experiment_filters,
@@ -122,10 +159,18 @@ class ExperimentController:
         """
         Refreshes the grid search results once (as it writes to InMemory cache already)
         Any views which need live data can call refresh() once when required and access data (subsequently) using controllers with reload = False
+        Only the experiments whose files changed since the last refresh are read from disk.
+        """
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        cache_controller.get_gs_results(grid_search_id, session_id, reload=True)
 
+    @staticmethod
+    def has_changes(session_id) -> bool:
+        """
+        Checks if the activated grid search changed on disk since the last refresh of the session.
         """
         grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
-        _ = cache_controller.get_gs_results(grid_search_id, session_id, reload=True).to_pandas_dataframe()
+        return cache_controller.has_changes(grid_search_id, session_id)
 
     @staticmethod
     def set_experiment_filters(session_id: str, filters: str):
@@ -154,7 +199,23 @@ class ExperimentController:
         return data
 
     @staticmethod
-    def _process_experiments_df(df_experiments: pd.DataFrame,
+    def get_experiment_columns(session_id: str, metric_tags: List[str] = None,
+                               reload: bool = False) -> ColumnarGridSearchResult:
+        """
+        Returns the filtered experiments of the activated grid search in columnar form (see `ColumnarGridSearchResult`),
+        in the same order as `get_experiment_ids`.
+        :param metric_tags: Metrics that are converted for all experiments of the grid search before filtering, such
+                            that the conversion is shared by all requests until the grid search changes
+        """
+        grid_search_id = GridSearchController.get_activated_grid_search_id(session_id)
+        experiment_ids = ExperimentController.get_experiment_ids(session_id)
+        columns = cache_controller.get_gs_results(grid_search_id, session_id, reload=reload).to_columnar()
+        for metric_tag in metric_tags or []:
+            columns.get_metric(metric_tag)
+        return columns.select(experiment_ids)
+
+    @staticmethod
+    def _process_experiments_df(gs_result: GridSearchResult,
                                 config_cols: List[str],
                                 metrics_settings: pd.DataFrame,
                                 experiment_filters: List[str],
@@ -162,13 +223,20 @@ class ExperimentController:
         # filter those columns in the dataframe
         df_selected_metrics = metrics_settings[metrics_settings["Selected"] == "y"]
         metrics_cols = df_selected_metrics["metrics"].tolist()
+        # aggregated metrics are answered from the experiment summaries without touching the full series
+        df_experiments_agg = None
+        if aggregate or experiment_filters:
+            aggregations = dict(zip(df_selected_metrics["metrics"], df_selected_metrics["Aggregation"]))
+            df_experiments_agg = ExperimentController._filter_columns(gs_result.to_summary_dataframe(aggregations),
+                                                                      config_cols, metrics_cols)
         # set the columns of the gridsearch table
-        df_experiments = ExperimentController._filter_columns(df_experiments, config_cols, metrics_cols)
-        # apply aggregation function to the respective columns in the grid search table
         if aggregate:
-            df_experiments = ExperimentController._apply_aggregation_functions(df_experiments, df_selected_metrics)
+            df_experiments = df_experiments_agg
+        else:
+            df_experiments = ExperimentController._filter_columns(gs_result.to_pandas_dataframe(metrics_cols),
+                                                                  config_cols, metrics_cols)
         # filter the respective experiment rows
-        df_experiments = ExperimentController._apply_experiment_filters(df_experiments, df_selected_metrics, experiment_filters)
+        df_experiments = ExperimentController._apply_experiment_filters(df_experiments, df_experiments_agg, experiment_filters)
         return df_experiments
 
     @staticmethod
@@ -179,20 +247,9 @@ class ExperimentController:
         return df[columns]
 
     @staticmethod
-    def _apply_aggregation_functions(df_experiments: pd.DataFrame, df_selected_metrics: pd.DataFrame):
-        df_experiments = df_experiments.copy()
-        agg_fun_dict = {"mean": np.mean, "max": np.max, "min": np.min, "first": lambda x: np.take(x, 0), "last": lambda x: np.take(x, -1)} # TODO check why x is sometimes not a list!!!!
-        for index, row in df_selected_metrics.iterrows():
-            agg_fun_key = row["Aggregation"]
-            agg_fun = agg_fun_dict[agg_fun_key]
-            df_experiments[row["metrics"]] = df_experiments[row["metrics"]].apply(agg_fun)
-        return df_experiments
-
-    @staticmethod
-    def _apply_experiment_filters(df_experiments: pd.DataFrame, df_selected_metrics: pd.DataFrame, filters: List[str]) -> pd.DataFrame:
+    def _apply_experiment_filters(df_experiments: pd.DataFrame, df_experiments_agg: pd.DataFrame, filters: List[str]) -> pd.DataFrame:
         if filters:
             # we want to apply the filters on the aggregate metrics data
-            df_experiments_agg = ExperimentController._apply_aggregation_functions(df_experiments, df_selected_metrics)
             col_data_types_dict = cell_data_types.infer_datatypes_for_columns(df_experiments_agg)
             # filter the dataframe
             for filter_expression in filters:
@@ -7,6 +7,7 @@ import json
 from datetime import datetime
 from dashify.visualization.controllers import data_controllers
 import pandas as pd
+import numpy as np
 
 class AnalysisExporter:
     @staticmethod
@@ -27,8 +28,9 @@ class AnalysisExporter:
             for experiment in grid_search_result.experiments:
                 experiment_dict = {
                     "experiment_id": experiment.identifier,
-                    "config": experiment.config,
-                    "metrics": experiment.metrics
+                    "config": dict(experiment.config),
+                    "metrics": {key: series.tolist() if isinstance(series, np.ndarray) else series
+                                for key, series in experiment.metrics.items()}
                 }
                 experiments_data.append(experiment_dict)
             
@@ -58,9 +60,6 @@ class AnalysisExporter:
         # create a directory in the home directory (TBD: use export settings)
         import_dir = os.path.join(Path.home(), "dashify_imports", str(datetime.now()))
 
-        # set the log dir
-        data_controllers.GridSearchController.set_log_dir(import_dir)
-
         # unpack
         for grid_search_data in analysis:
             grid_search_id = grid_search_data["grid_search_id"]
@@ -75,7 +74,12 @@ class AnalysisExporter:
                 os.makedirs(experiment_folder)
                 json.dump(config, open(os.path.join(experiment_folder, "config.json"), "w"))
                 json.dump(metrics, open(os.path.join(experiment_folder, "metrics.json"), "w"))
-            
+
+        # set the log dir once the grid searches exist, such that the log dir watcher sees all of them
+        data_controllers.GridSearchController.set_log_dir(import_dir)
+
+        for grid_search_data in analysis:
+            grid_search_id = grid_search_data["grid_search_id"]
             # Calls bunch of controllers (may not be the elegant way)
             data_controllers.cache_controller.set_selected_configs_settings(grid_search_id, session_id, grid_search_data["config_settings"])
             data_controllers.cache_controller.set_metrics_settings(grid_search_id, session_id, pd.DataFrame.from_dict(grid_search_data["metric_settings"]))
@@ -1,9 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import functools
 import json
-import glob
+import logging
 import os
+import sqlite3
+import tarfile
+import zipfile
+from urllib.parse import unquote
+import numpy as np
 from dashify.visualization.data_model.grid_search_result import GridSearchResult
 from dashify.visualization.data_model.experiment import Experiment
-from typing import Dict, List
+from dashify.visualization.data_model.lazy_metrics import LazyMetrics
+from dashify.visualization.data_import.experiment_index import ExperimentIndex
+from dashify.logging.metrics_log import MetricsLog
+from dashify.logging.metrics_summary import MetricsSummary
+from dashify.logging.binary_metrics import BinaryMetricsStore
+from typing import Dict, List, Tuple, Set, Iterable, Callable
+
+logger = logging.getLogger(__name__)
 
 
 class LocalDataLoader:
@@ -11,47 +25,293 @@ class LocalDataLoader:
     Static class that loads the experiments of a given grid search from disk
     and creates a `GridSearchResult` object.
     """
+    config_name = "config.json"
+    # an experiment has metrics if any of its metrics files exists
+    metrics_names = {MetricsLog.legacy_name, MetricsLog.log_name}
+    # files that determine the loaded experiment, i.e., the experiment is reloaded if any of them changes
+    fingerprinted_names = {config_name, MetricsSummary.file_name} | metrics_names
+    # folders inside of experiments that never contain experiments
+    skipped_folder_names = {"checkpoints", BinaryMetricsStore.folder_name}
+    # default number of experiments loaded concurrently (None: sequential loading)
+    num_workers: int = None
+    # default executor of concurrent loading: "thread" (I/O bound, e.g., network filesystems) or
+    # "process" (parse bound, e.g., large JSON metrics files)
+    executor: str = "thread"
+    # default of whether the persistent index of a grid search is used
+    use_index: bool = True
+    # default of whether metric series are loaded lazily
+    lazy: bool = False
+    # whether lazily loaded series are located via the byte-offset index of `metrics.json` (see `MetricsJsonReader`)
+    use_offset_index: bool = True
 
     @staticmethod
-    def get_grid_search_results(gs_log_dir: str) -> GridSearchResult:
+    def get_grid_search_results(gs_log_dir: str, num_workers: int = None, executor: str = None,
+                                skip_incomplete: bool = True, use_index: bool = None,
+                                lazy: bool = None) -> GridSearchResult:
         """
         Creates a `GridSearchResult` from a given logging directory.
         :param gs_log_dir: Path to grid search logs
+        :param num_workers: Maximum number of experiments that are loaded concurrently.
+                            Defaults to `LocalDataLoader.num_workers`. With None or 1, experiments are loaded sequentially.
+        :param executor: "thread" or "process", defaults to `LocalDataLoader.executor`
+        :param skip_incomplete: If True, experiments that miss their config or metrics file (e.g., the worker crashed
+                                right after creating the folder) are skipped and listed in
+                                `GridSearchResult.incomplete_experiment_ids`. Otherwise, an exception is raised.
+        :param use_index: If True, unchanged experiments are loaded from the persistent `ExperimentIndex` of the
+                          grid search, which is updated with all other experiments once their files stopped
+                          changing (see `_get_index_entries`). Defaults to `LocalDataLoader.use_index`.
+        :param lazy: If True, only configs, summaries and metric keys are kept in memory. Each series is read
+                     (from the index if possible) when it is accessed and kept in the bounded `LazyMetrics.cache`.
+                     Defaults to `LocalDataLoader.lazy`.
         :return: GridSearchResult
         """
         gs_result = GridSearchResult(gs_log_dir)
-        config_paths = glob.glob(os.path.join(gs_log_dir, "**/config.json"), recursive=True)
-        metric_paths = glob.glob(os.path.join(gs_log_dir, "**/metrics.json"), recursive=True)
-
-        LocalDataLoader._check_integrity_of_logs(config_paths, metric_paths)
-
-        # load configs and metrics into dictionaries (experiment_id -> loaded_resource)
-        configs = {LocalDataLoader._resource_path_to_experiment_id(config_path, gs_log_dir): LocalDataLoader._load_file(resource_path=config_path)
-                   for config_path in config_paths}
-        metrics = {LocalDataLoader._resource_path_to_experiment_id(metric_path, gs_log_dir): LocalDataLoader._load_file(resource_path=metric_path)
-                   for metric_path in metric_paths}
-
-        # create experiment and store in grid search result object
-        for experiment_id in configs.keys():
-            experiment = Experiment(config=configs[experiment_id],
-                                    metrics=metrics[experiment_id],
-                                    identifier=experiment_id)
-            gs_result.add_experiment(experiment)
+        return LocalDataLoader.update_grid_search_results(gs_result, num_workers=num_workers, executor=executor,
+                                                          skip_incomplete=skip_incomplete, use_index=use_index,
+                                                          lazy=lazy)
+
+    @staticmethod
+    def update_grid_search_results(gs_result: GridSearchResult, num_workers: int = None, executor: str = None,
+                                   skip_incomplete: bool = True, use_index: bool = None,
+                                   lazy: bool = None, experiment_ids: Iterable[str] = None) -> GridSearchResult:
+        """
+        Brings a `GridSearchResult` up to date with its logging directory (in place). Each file of an experiment is
+        fingerprinted by its (mtime, size, inode), such that only new experiments and experiments whose files
+        changed since the last load are read from disk. Experiments that were deleted are removed.
+        :param gs_result: GridSearchResult to be updated
+        :param num_workers: see `get_grid_search_results`
+        :param executor: see `get_grid_search_results`
+        :param skip_incomplete: see `get_grid_search_results`
+        :param use_index: see `get_grid_search_results`
+        :param lazy: see `get_grid_search_results`
+        :param experiment_ids: If given, only the folders of these experiments (or of folders containing experiments)
+                               are scanned, e.g., the experiments that a `LogDirWatcher` reported as changed.
+                               All other experiments are kept as they are.
+        :return: the updated gs_result
+        """
+        lazy = lazy if lazy is not None else LocalDataLoader.lazy
+        use_index = use_index if use_index is not None else LocalDataLoader.use_index
+        num_workers = num_workers if num_workers is not None else LocalDataLoader.num_workers
+        executor = executor if executor is not None else LocalDataLoader.executor
+        gs_log_dir = gs_result.gs_log_dir
+        config_folders, metrics_folders, fingerprints = LocalDataLoader._scan_experiment_folders(gs_log_dir,
+                                                                                                  experiment_ids)
+        scanned_ids, incomplete_ids = LocalDataLoader._check_integrity_of_logs(config_folders, metrics_folders)
+        if incomplete_ids:
+            if not skip_incomplete:
+                raise Exception(f"Dataset corrupt, incomplete experiments: {incomplete_ids}")
+            logger.warning(f"Skipping {len(incomplete_ids)} incomplete experiments in {gs_log_dir}: {incomplete_ids}")
+
+        experiments = {experiment.identifier: experiment for experiment in gs_result.experiments}
+        if experiment_ids is None:
+            gs_result.incomplete_experiment_ids = incomplete_ids
+            experiment_ids = scanned_ids
+        else:
+            # experiments outside of the scanned folders are kept as they are
+            is_scanned = functools.partial(LocalDataLoader._is_in_folders, set(experiment_ids))
+            gs_result.incomplete_experiment_ids = sorted(
+                [experiment_id for experiment_id in gs_result.incomplete_experiment_ids if not is_scanned(experiment_id)]
+                + incomplete_ids)
+            experiment_ids = sorted([experiment_id for experiment_id in experiments if not is_scanned(experiment_id)]
+                                    + scanned_ids)
+            fingerprints = {**gs_result.file_fingerprints, **fingerprints}
+        changed_ids = [experiment_id for experiment_id in experiment_ids
+                       if experiment_id not in experiments or
+                       gs_result.file_fingerprints.get(experiment_id) != fingerprints[experiment_id]]
+
+        # experiments whose fingerprints match the persistent index are not parsed from their files
+        index = ExperimentIndex.open(gs_log_dir) if use_index else None
+        loaded_experiments = {}
+        if index is not None:
+            stored_fingerprints = index.get_fingerprints()
+            load_from_index = index.load_without_series if lazy else index.load
+            loaded_experiments = load_from_index([experiment_id for experiment_id in changed_ids
+                                                  if stored_fingerprints.get(experiment_id) ==
+                                                  ExperimentIndex.encode_fingerprint(fingerprints[experiment_id])])
+        indexed_ids = set(loaded_experiments)
+        missing_ids = [experiment_id for experiment_id in changed_ids if experiment_id not in loaded_experiments]
+        experiment_folders = [os.path.join(gs_log_dir, experiment_id) for experiment_id in missing_ids]
+
+        # load (config, metrics, summary) of each experiment, the results keep the order of the experiment ids.
+        # In lazy mode, no series is parsed, i.e., experiments that are not indexed yet are not added to the index.
+        load_experiment = LocalDataLoader._load_experiment_without_series if lazy else LocalDataLoader._load_experiment
+        if num_workers is None or num_workers <= 1:
+            loaded = [load_experiment(folder) for folder in experiment_folders]
+        elif executor == "thread":
+            with ThreadPoolExecutor(max_workers=num_workers) as pool:
+                loaded = list(pool.map(load_experiment, experiment_folders))
+        elif executor == "process":
+            with ProcessPoolExecutor(max_workers=num_workers) as pool:
+                loaded = list(pool.map(load_experiment, experiment_folders,
+                                       chunksize=max(1, len(experiment_folders) // (4 * num_workers))))
+        else:
+            raise Exception(f"Unknown executor {executor}. Supported executors: thread, process")
+
+        if index is not None:
+            try:
+                if not lazy:
+                    index.store(LocalDataLoader._get_index_entries(experiments, experiment_ids, changed_ids,
+                                                                   dict(zip(missing_ids, loaded)), fingerprints,
+                                                                   stored_fingerprints))
+                index.retain(experiment_ids)
+            except sqlite3.Error as e:
+                logger.warning(f"Cannot update the experiment index {index.index_path} ({e}).")
+                index = None
+
+        loaded_experiments.update(zip(missing_ids, loaded))
+        for experiment_id, (config, metrics, summary) in loaded_experiments.items():
+            if lazy:
+                # only the metric keys are kept, the series are read from the index (or files) on access
+                experiment_folder = os.path.join(gs_log_dir, experiment_id)
+                load_all_series = None
+                if index is not None and experiment_id in indexed_ids:
+                    load_series = functools.partial(index.load_series, experiment_id)
+                else:
+                    load_series = functools.partial(LocalDataLoader._load_series, experiment_folder)
+                    if os.path.exists(os.path.join(experiment_folder, MetricsLog.log_name)):
+                        # each series requires replaying the whole log, hence all series are read (and cached) at once
+                        load_all_series = functools.partial(MetricsLog.load, experiment_folder)
+                metrics = LazyMetrics(list(metrics), load_series, load_all_series)
+            experiments[experiment_id] = Experiment(config=config, metrics=metrics, identifier=experiment_id,
+                                                    summary=summary)
+        # the experiments (and their fingerprints) are replaced in place, deleted experiments are dropped
+        gs_result.set_experiments(experiments[experiment_id] for experiment_id in experiment_ids)
+        gs_result.file_fingerprints = {experiment_id: fingerprints[experiment_id] for experiment_id in experiment_ids}
         return gs_result
 
     @staticmethod
-    def _check_integrity_of_logs(config_paths: List[str], metric_paths: List[str]):
+    def _get_index_entries(experiments: Dict[str, Experiment], experiment_ids: List[str], changed_ids: List[str],
+                           loaded: Dict[str, Tuple], fingerprints: Dict[str, Tuple],
+                           stored_fingerprints: Dict[str, str]) -> Dict[str, Tuple]:
+        """
+        Selects the experiments that are written to the index. Experiments that changed since the previous update
+        of the grid search result are most likely still running, hence they are not written on every refresh, but
+        once their files stopped changing (from memory, i.e., without parsing them again).
+        :param experiments: Experiments of the grid search result before the update
+        :param experiment_ids: Ids of all experiments after the update
+        :param changed_ids: Ids of the new experiments and of those whose fingerprints changed
+        :param loaded: Experiments parsed from their files, experiment id -> (config, metrics, summary)
+        :param fingerprints: Fingerprints of all experiments
+        :param stored_fingerprints: Encoded fingerprints of the indexed experiments
+        :return: Dictionary mapping experiment ids to (fingerprint, config, metrics, summary)
+        """
+        entries = {experiment_id: (fingerprints[experiment_id],) + experiment
+                   for experiment_id, experiment in loaded.items() if experiment_id not in experiments}
+        changed_ids = set(changed_ids)
+        for experiment_id in experiment_ids:
+            fingerprint = fingerprints[experiment_id]
+            if experiment_id in changed_ids or \
+                    stored_fingerprints.get(experiment_id) == ExperimentIndex.encode_fingerprint(fingerprint):
+                continue
+            experiment = experiments[experiment_id]
+            entries[experiment_id] = (fingerprint, dict(experiment.config), dict(experiment.metrics),
+                                      dict(experiment.summary))
+        return entries
+
+    @staticmethod
+    def _load_experiment(experiment_folder: str) -> Tuple[Dict, Dict[str, List], Dict]:
+        """
+        Loads config, metrics and summary of a single experiment.
+        """
+        config = LocalDataLoader._load_file(resource_path=os.path.join(experiment_folder, LocalDataLoader.config_name))
+        metrics = LocalDataLoader._load_metrics(resource_path=os.path.join(experiment_folder, MetricsLog.legacy_name))
+        summary = LocalDataLoader._load_summary(experiment_folder, metrics)
+        return config, metrics, summary
+
+    @staticmethod
+    def _load_experiment_without_series(experiment_folder: str) -> Tuple[Dict, List[str], Dict]:
+        """
+        Loads config, metric keys and summary of a single experiment without parsing any series. The metric keys
+        are taken from `summary.json` and the binary metrics or, for experiments logged without summary, listed from
+        the metrics files (see `MetricsLog.get_keys`). Metrics without summary entry are aggregated from their series
+        on access.
+        """
+        config = LocalDataLoader._load_file(resource_path=os.path.join(experiment_folder, LocalDataLoader.config_name))
+        summary = MetricsSummary.load(experiment_folder)
+        if summary is None:
+            metric_keys = MetricsLog.get_keys(experiment_folder, use_offset_index=LocalDataLoader.use_offset_index)
+            summary = {key: None for key in metric_keys}
+        else:
+            # binary metrics can be written without summary, listing them does not read any values
+            for key in BinaryMetricsStore.get_metric_keys(experiment_folder):
+                summary.setdefault(key, None)
+        return config, list(summary), summary
+
+    @staticmethod
+    def _scan_experiment_folders(gs_log_dir: str, folders: Iterable[str] = None) -> \
+            Tuple[Set[str], Set[str], Dict[str, Tuple]]:
+        """
+        Walks the grid search directory once via `os.scandir` and collects the experiment folders containing a
+        config file and those containing metrics. Checkpoint and binary metrics folders are not descended into.
+        :param gs_log_dir: Path to grid search logs
+        :param folders: If given, only these folders (relative to `gs_log_dir`) are walked
+        :return: Experiment ids (relative folder paths) with config file, experiment ids with metrics and
+                 the fingerprints of the experiments' files (experiment id -> fingerprint)
+        """
+        config_folders, metrics_folders, fingerprints = set(), set(), dict()
+        if folders is None:
+            pending = [gs_log_dir]
+        else:
+            pending = [os.path.join(gs_log_dir, folder) for folder in folders
+                       if os.path.isdir(os.path.join(gs_log_dir, folder))]
+        while pending:
+            folder = pending.pop()
+            file_names, sub_folders, file_stats = set(), [], []
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if entry.name == BinaryMetricsStore.folder_name:
+                            file_stats.extend(LocalDataLoader._get_file_stats(entry.path, prefix=entry.name + "/"))
+                        elif entry.name not in LocalDataLoader.skipped_folder_names:
+                            sub_folders.append(entry.path)
+                    else:
+                        file_names.add(entry.name)
+                        if entry.name in LocalDataLoader.fingerprinted_names:
+                            file_stats.append(LocalDataLoader._get_file_stat(entry))
+            experiment_id = os.path.relpath(folder, gs_log_dir)
+            fingerprints[experiment_id] = tuple(sorted(file_stats))
+            has_config = LocalDataLoader.config_name in file_names
+            has_metrics = not file_names.isdisjoint(LocalDataLoader.metrics_names)
+            if has_config:
+                config_folders.add(experiment_id)
+            if has_metrics:
+                metrics_folders.add(experiment_id)
+            pending.extend(sub_folders)
+        return config_folders, metrics_folders, fingerprints
+
+    @staticmethod
+    def _is_in_folders(folders: Set[str], experiment_id: str) -> bool:
+        """
+        Checks if an experiment id is one of the folders or lies inside of one of them.
+        """
+        while experiment_id:
+            if experiment_id in folders:
+                return True
+            experiment_id = os.path.dirname(experiment_id)
+        return False
+
+    @staticmethod
+    def _get_file_stat(entry: os.DirEntry) -> Tuple[str, int, int, int]:
+        stat = entry.stat()
+        return entry.name, stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @staticmethod
+    def _get_file_stats(folder: str, prefix: str) -> List[Tuple[str, int, int, int]]:
+        with os.scandir(folder) as entries:
+            return [(prefix + name, mtime, size, inode)
+                    for name, mtime, size, inode in map(LocalDataLoader._get_file_stat, entries)]
+
+    @staticmethod
+    def _check_integrity_of_logs(config_folders: Set[str], metrics_folders: Set[str]) -> Tuple[List[str], List[str]]:
         """
-        Makes sure that each experiment has all files present.
-        :param config_paths: List of config file paths
-        :param metric_paths: List of metric file paths
-        :return:
+        Checks that each experiment has all files present.
+        :param config_folders: Experiment ids with config file
+        :param metrics_folders: Experiment ids with metrics
+        :return: Sorted ids of the complete experiments and sorted ids of the incomplete experiments
         """
-        experiments_configs = [os.path.dirname(c) for c in config_paths]
-        experiments_metrics = [os.path.dirname(m) for m in metric_paths]
-        intersection = [e for e in experiments_metrics if e in experiments_configs]
-        if len(intersection) != len(experiments_configs) or len(intersection) != len(experiments_metrics):
-            raise Exception("Dataset corrupt!!!")
+        complete = config_folders & metrics_folders
+        incomplete = config_folders ^ metrics_folders
+        return sorted(complete), sorted(incomplete)
 
     @staticmethod
     def _load_file(resource_path: str):
@@ -59,11 +319,166 @@ class LocalDataLoader:
             return json.load(f)
 
     @staticmethod
-    def _resource_path_to_experiment_id(experiment_file_path: str, gs_log_dir: str) -> str:
+    def _load_metrics(resource_path: str):
+        """
+        Loads the metrics of an experiment given the path to its `metrics.json`. If present, the append-only
+        metrics log next to it is replayed and compacted into the same dictionary of lists. Binary metrics
+        are read into memory, since a memory-mapped series would hold an open file descriptor for as long as the
+        grid search is cached (one per series and experiment).
+        :param resource_path: Path to the metrics file
+        :return: Dictionary mapping metric keys to their series
+        """
+        return MetricsLog.load(os.path.dirname(resource_path))
+
+    @staticmethod
+    def _load_series(experiment_folder: str, metric_key: str):
+        """
+        Loads a single metric series of an experiment from its files. Only the series itself is parsed from
+        `metrics.json`, located via the file's byte-offset index if `LocalDataLoader.use_offset_index` is set.
+        """
+        return MetricsLog.load(experiment_folder, metric_keys=[metric_key],
+                               use_offset_index=LocalDataLoader.use_offset_index)[metric_key]
+
+    @staticmethod
+    def _load_summary(experiment_folder: str, metrics: Dict[str, List]) -> Dict:
+        """
+        Loads the summary statistics of an experiment. Experiments that were logged without summary or whose
+        summary is outdated are summarized from their metrics.
+        """
+        summary = MetricsSummary.load(experiment_folder)
+        if summary is None or not MetricsSummary.is_consistent(summary, metrics):
+            summary = MetricsSummary.from_metrics(metrics)
+        return summary
+
+    @staticmethod
+    def list_grid_search_ids(log_dir: str) -> List[str]:
+        """
+        Lists the grid searches of a log dir, i.e., its folders and grid search archive files
+        (see `ArchiveDataLoader`). Folders are always loaded as folders, even if they are named like an archive.
+        """
+        paths = {name: os.path.join(log_dir, name) for name in os.listdir(log_dir)}
+        return [name for name, path in paths.items() if os.path.isdir(path) or ArchiveDataLoader.is_archive(path)]
+
+
+class ArchiveDataLoader:
+    """
+    Static class that loads the experiments of an archived grid search (`.zip`, `.tar`, `.tar.gz`, ...)
+    and creates a `GridSearchResult` object. The members are streamed straight from the archive, i.e., the archive
+    is never extracted to disk.
+
+    If all members are stored under a top-level folder named like the archive (e.g., `gs_1/...` in `gs_1.tar.gz`),
+    this folder is not part of the experiment ids.
+    """
+    archive_extensions = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+    @staticmethod
+    def is_archive(path: str) -> bool:
+        """
+        :param path: Path to a grid search, e.g., a folder or an archive in the log dir
+        :return: True if the path is a file with one of the `archive_extensions`
+        """
+        return path.lower().endswith(ArchiveDataLoader.archive_extensions) and os.path.isfile(path)
+
+    @staticmethod
+    def get_grid_search_results(archive_path: str, skip_incomplete: bool = True) -> GridSearchResult:
+        """
+        Creates a `GridSearchResult` from a grid search archive.
+        :param archive_path: Path to the archive
+        :param skip_incomplete: see `LocalDataLoader.get_grid_search_results`
+        :return: GridSearchResult
+        """
+        gs_result = GridSearchResult(archive_path)
+        return ArchiveDataLoader.update_grid_search_results(gs_result, skip_incomplete=skip_incomplete)
+
+    @staticmethod
+    def update_grid_search_results(gs_result: GridSearchResult, skip_incomplete: bool = True) -> GridSearchResult:
+        """
+        Reloads all experiments of an archived grid search (in place) if the archive changed since the last load.
+        """
+        archive_path = gs_result.gs_log_dir
+        stat = os.stat(archive_path)
+        fingerprint = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if gs_result.experiments and gs_result.file_fingerprints.get(os.curdir) == fingerprint:
+            return gs_result
+
+        files = ArchiveDataLoader._read_members(archive_path)
+        config_folders = {folder for folder, name in files if name == LocalDataLoader.config_name}
+        metrics_folders = {folder for folder, name in files if name in LocalDataLoader.metrics_names}
+        experiment_ids, incomplete_ids = LocalDataLoader._check_integrity_of_logs(config_folders, metrics_folders)
+        if incomplete_ids:
+            if not skip_incomplete:
+                raise Exception(f"Dataset corrupt, incomplete experiments: {incomplete_ids}")
+            logger.warning(f"Skipping {len(incomplete_ids)} incomplete experiments in {archive_path}: {incomplete_ids}")
+
+        experiments = []
+        for experiment_id in experiment_ids:
+            config = json.loads(files[(experiment_id, LocalDataLoader.config_name)])
+            metrics = ArchiveDataLoader._parse_metrics(files, experiment_id)
+            summary = files.get((experiment_id, MetricsSummary.file_name))
+            summary = json.loads(summary) if summary is not None else None
+            if summary is None or not MetricsSummary.is_consistent(summary, metrics):
+                summary = MetricsSummary.from_metrics(metrics)
+            experiments.append(Experiment(config=config, metrics=metrics, identifier=experiment_id, summary=summary))
+        gs_result.set_experiments(experiments)
+        gs_result.incomplete_experiment_ids = incomplete_ids
+        gs_result.file_fingerprints = {os.curdir: fingerprint}
+        return gs_result
+
+    @staticmethod
+    def _read_members(archive_path: str) -> Dict[Tuple[str, str], bytes]:
+        """
+        Reads the config, metrics and summary files of all experiments in a single pass over the archive.
+        Binary metrics are keyed by `metrics_bin/<file name>`.
+        :return: Dictionary mapping (experiment id, file name) to the file's content
+        """
+        root = os.path.basename(archive_path)
+        for extension in ArchiveDataLoader.archive_extensions:
+            if root.lower().endswith(extension):
+                root = root[:-len(extension)]
+                break
+        members = {}
+
+        def add_member(member_name: str, read: Callable[[], bytes]):
+            parts = [part for part in member_name.split("/") if part not in ("", os.curdir)]
+            if len(parts) > 1 and parts[-2] == BinaryMetricsStore.folder_name:
+                folder, name = parts[:-2], BinaryMetricsStore.folder_name + "/" + parts[-1]
+            elif parts and parts[-1] in LocalDataLoader.fingerprinted_names:
+                folder, name = parts[:-1], parts[-1]
+            else:
+                return
+            members[(os.path.join(*folder) if folder else os.curdir, name)] = read()
+
+        if archive_path.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        add_member(info.filename, functools.partial(archive.read, info))
+        else:
+            # "r|*" streams the (compressed) archive sequentially instead of seeking in it
+            with tarfile.open(archive_path, mode="r|*") as archive:
+                for info in archive:
+                    if info.isfile():
+                        add_member(info.name, lambda: archive.extractfile(info).read())
+
+        folders = {folder for folder, _ in members}
+        if folders and all(folder == root or folder.startswith(root + os.sep) for folder in folders):
+            members = {(os.path.relpath(folder, root), name): content for (folder, name), content in members.items()}
+        return members
+
+    @staticmethod
+    def _parse_metrics(files: Dict[Tuple[str, str], bytes], experiment_id: str) -> Dict[str, List]:
         """
-        Maps the file path of a config or metrics file to the respective experiment id.
-        :param experiment_file_path:
-        :param gs_log_dir:
-        :return:
+        Same as `MetricsLog.load` for the files of an experiment in the archive.
         """
-        return os.path.dirname(os.path.relpath(experiment_file_path, gs_log_dir))
+        legacy_metrics = files.get((experiment_id, MetricsLog.legacy_name))
+        metrics = json.loads(legacy_metrics) if legacy_metrics else {}
+        log = files.get((experiment_id, MetricsLog.log_name))
+        if log is not None:
+            for measurement_id, record in MetricsLog.parse_records(log.decode("utf-8").splitlines(keepends=True)):
+                MetricsLog.merge_record(metrics, record, measurement_id)
+        prefix = BinaryMetricsStore.folder_name + "/"
+        for (folder, name), content in sorted(files.items()):
+            if folder == experiment_id and name.startswith(prefix) and name.endswith(BinaryMetricsStore.file_extension):
+                metric_key = unquote(name[len(prefix):-len(BinaryMetricsStore.file_extension)])
+                metrics[metric_key] = np.frombuffer(content, dtype=BinaryMetricsStore.dtype)
+        return metrics
@@ -0,0 +1,158 @@
+from contextlib import closing
+from typing import Dict, List, Tuple, Any, Iterable
+import json
+import logging
+import os
+import sqlite3
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ExperimentIndex:
+    """
+    Persistent SQLite index of a grid search, stored as `.dashify_index.sqlite` inside the grid search folder.
+
+    For each experiment, the index holds the fingerprint of its files (see `LocalDataLoader._scan_experiment_folders`),
+    its config, its summary and its metric series (one row per metric). An experiment whose fingerprint matches
+    the index is loaded from the index instead of parsing its JSON files. Numpy series (binary metrics) are stored
+    as raw float64 bytes, all other series as JSON.
+    """
+    file_name = ".dashify_index.sqlite"
+    schema_version = "1"
+
+    def __init__(self, gs_log_dir: str):
+        self.index_path = os.path.join(gs_log_dir, ExperimentIndex.file_name)
+
+    @staticmethod
+    def open(gs_log_dir: str) -> "ExperimentIndex":
+        """
+        Opens (or creates) the index of a grid search.
+        :return: The index or `None` if the index cannot be used, e.g., the grid search folder is read-only
+        """
+        index = ExperimentIndex(gs_log_dir)
+        try:
+            index._create_tables()
+        except sqlite3.Error as e:
+            logger.warning(f"Cannot use the experiment index {index.index_path} ({e}), loading from files.")
+            return None
+        return index
+
+    def get_fingerprints(self) -> Dict[str, str]:
+        """
+        :return: Dictionary mapping the indexed experiment ids to their encoded fingerprints
+        """
+        with closing(self._connect()) as connection:
+            return dict(connection.execute("SELECT experiment_id, fingerprint FROM experiments"))
+
+    def load(self, experiment_ids: List[str]) -> Dict[str, Tuple[Dict, Dict[str, Any], Dict]]:
+        """
+        Loads the config, metrics and summary of indexed experiments.
+        :param experiment_ids: Ids of the experiments
+        :return: Dictionary mapping experiment ids to (config, metrics, summary)
+        """
+        loaded = {}
+        with closing(self._connect()) as connection:
+            for experiment_id in experiment_ids:
+                row = connection.execute("SELECT config, summary FROM experiments WHERE experiment_id = ?",
+                                         (experiment_id,)).fetchone()
+                if row is None:
+                    continue
+                metrics = {key: ExperimentIndex._decode_series(encoding, series) for key, encoding, series in
+                           connection.execute("SELECT metric_key, encoding, series FROM metrics "
+                                              "WHERE experiment_id = ? ORDER BY position", (experiment_id,))}
+                loaded[experiment_id] = json.loads(row[0]), metrics, json.loads(row[1])
+        return loaded
+
+    def load_without_series(self, experiment_ids: List[str]) -> Dict[str, Tuple[Dict, List[str], Dict]]:
+        """
+        Loads the config, metric keys and summary of indexed experiments, e.g., for lazy loading of the series.
+        :param experiment_ids: Ids of the experiments
+        :return: Dictionary mapping experiment ids to (config, metric keys, summary)
+        """
+        loaded = {}
+        with closing(self._connect()) as connection:
+            for experiment_id in experiment_ids:
+                row = connection.execute("SELECT config, summary FROM experiments WHERE experiment_id = ?",
+                                         (experiment_id,)).fetchone()
+                if row is None:
+                    continue
+                metric_keys = [key for key, in connection.execute(
+                    "SELECT metric_key FROM metrics WHERE experiment_id = ? ORDER BY position", (experiment_id,))]
+                loaded[experiment_id] = json.loads(row[0]), metric_keys, json.loads(row[1])
+        return loaded
+
+    def load_series(self, experiment_id: str, metric_key: str) -> Any:
+        """
+        Loads a single metric series of an indexed experiment.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT encoding, series FROM metrics WHERE experiment_id = ? AND metric_key = ?",
+                                     (experiment_id, metric_key)).fetchone()
+        if row is None:
+            raise KeyError(metric_key)
+        return ExperimentIndex._decode_series(*row)
+
+    def store(self, entries: Dict[str, Tuple[Tuple, Dict, Dict[str, Any], Dict]]):
+        """
+        Inserts or replaces experiments in the index.
+        :param entries: Dictionary mapping experiment ids to (fingerprint, config, metrics, summary)
+        """
+        with closing(self._connect()) as connection, connection:
+            for experiment_id, (fingerprint, config, metrics, summary) in entries.items():
+                self._delete(connection, [experiment_id])
+                connection.execute("INSERT INTO experiments VALUES (?, ?, ?, ?)",
+                                   (experiment_id, ExperimentIndex.encode_fingerprint(fingerprint),
+                                    json.dumps(config), json.dumps(summary)))
+                connection.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?, ?)",
+                                       [(experiment_id, key, position) + ExperimentIndex._encode_series(series)
+                                        for position, (key, series) in enumerate(metrics.items())])
+
+    def retain(self, experiment_ids: Iterable[str]):
+        """
+        Removes all experiments from the index that are not in `experiment_ids`, e.g., deleted experiments.
+        """
+        experiment_ids = set(experiment_ids)
+        deleted_ids = [experiment_id for experiment_id in self.get_fingerprints() if experiment_id not in experiment_ids]
+        if deleted_ids:
+            with closing(self._connect()) as connection, connection:
+                self._delete(connection, deleted_ids)
+
+    @staticmethod
+    def encode_fingerprint(fingerprint: Tuple) -> str:
+        return json.dumps(fingerprint)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _create_tables(self):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            version = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if version is not None and version[0] != ExperimentIndex.schema_version:
+                connection.execute("DROP TABLE IF EXISTS experiments")
+                connection.execute("DROP TABLE IF EXISTS metrics")
+            connection.execute("INSERT OR REPLACE INTO meta VALUES ('schema_version', ?)",
+                               (ExperimentIndex.schema_version,))
+            connection.execute("CREATE TABLE IF NOT EXISTS experiments (experiment_id TEXT PRIMARY KEY, "
+                               "fingerprint TEXT NOT NULL, config TEXT NOT NULL, summary TEXT NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS metrics (experiment_id TEXT, metric_key TEXT, "
+                               "position INTEGER, encoding TEXT, series BLOB, PRIMARY KEY (experiment_id, metric_key))")
+
+    @staticmethod
+    def _delete(connection: sqlite3.Connection, experiment_ids: List[str]):
+        for experiment_id in experiment_ids:
+            connection.execute("DELETE FROM experiments WHERE experiment_id = ?", (experiment_id,))
+            connection.execute("DELETE FROM metrics WHERE experiment_id = ?", (experiment_id,))
+
+    @staticmethod
+    def _encode_series(series: Any) -> Tuple[str, Any]:
+        if isinstance(series, np.ndarray):
+            return "f8", np.ascontiguousarray(series, dtype="<f8").tobytes()
+        return "json", json.dumps(series)
+
+    @staticmethod
+    def _decode_series(encoding: str, series: Any) -> Any:
+        if encoding == "f8":
+            return np.frombuffer(series, dtype="<f8")
+        return json.loads(series)
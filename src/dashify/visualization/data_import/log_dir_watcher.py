@@ -0,0 +1,276 @@
+from typing import Dict, List, Set, Optional, Tuple
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import threading
+from dashify.logging.binary_metrics import BinaryMetricsStore
+from dashify.visualization.data_import.data_loaders import LocalDataLoader, ArchiveDataLoader
+
+logger = logging.getLogger(__name__)
+
+
+class Inotify:
+    """
+    Minimal ctypes binding of the Linux inotify API.
+    """
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    watch_mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    _event_header = struct.Struct("iIII")
+
+    def __init__(self):
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), Inotify.watch_mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """
+        Waits at most `timeout` seconds for events.
+        :return: List of (watch descriptor, mask, name) tuples
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset < len(data):
+            wd, mask, _, length = Inotify._event_header.unpack_from(data, offset)
+            offset += Inotify._event_header.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+class LogDirWatcher:
+    """
+    Tracks changes under the log dir from a background thread, via inotify on Linux and by periodically comparing
+    the fingerprints of all experiments (see `LocalDataLoader._scan_experiment_folders`) everywhere else.
+
+    The watcher keeps the list of grid search ids and, per grid search, the experiments that changed. Each change
+    increases a version counter, such that each consumer (e.g., a session) can ask for the experiments that
+    changed since the version it has seen last.
+    """
+
+    def __init__(self, log_dir: str, poll_interval: float = 2.0, use_inotify: bool = True):
+        """
+        :param log_dir: Root directory of the grid searches
+        :param poll_interval: Time in seconds between two scans of the polling backend
+        :param use_inotify: If False, the polling backend is used also on Linux
+        """
+        self.log_dir = log_dir
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.backend = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._version = 0
+        self._grid_search_ids = LogDirWatcher._list_grid_search_ids(log_dir)
+        # grid search id -> version of its last change
+        self._grid_search_versions: Dict[str, int] = {}
+        # grid search id -> experiment id -> version of the experiment's last change
+        self._changed_experiments: Dict[str, Dict[str, int]] = {}
+        # grid search id -> version of the last change that requires a full reload (e.g., lost inotify events)
+        self._full_reload_versions: Dict[str, int] = {}
+        # inotify: watch descriptor -> watched directory
+        self._watched_folders: Dict[int, str] = {}
+        # polling: grid search id -> experiment id -> fingerprint
+        self._fingerprints: Dict[str, Dict[str, Tuple]] = {}
+
+    def start(self) -> "LogDirWatcher":
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = Inotify()
+                self._watch_tree(inotify, self.log_dir)
+            except (OSError, AttributeError) as e:
+                # e.g., no Linux or the limit of inotify watches is exceeded
+                logger.warning(f"Cannot watch {self.log_dir} via inotify ({e}), falling back to polling.")
+                if inotify is not None:
+                    inotify.close()
+                inotify = None
+        if inotify is not None:
+            self.backend = "inotify"
+            self._thread = threading.Thread(target=self._run_inotify, args=(inotify,), daemon=True)
+        else:
+            self.backend = "polling"
+            for grid_search_id in self._grid_search_ids:
+                self._fingerprints[grid_search_id] = self._scan_grid_search(grid_search_id)
+            self._thread = threading.Thread(target=self._run_polling, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def get_grid_search_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._grid_search_ids)
+
+    def get_version(self, grid_search_id: str) -> int:
+        """
+        :return: Version of the last change of the grid search (0 if it did not change since the watcher started)
+        """
+        with self._lock:
+            return self._grid_search_versions.get(grid_search_id, 0)
+
+    def get_changed_experiment_ids(self, grid_search_id: str, since_version: int) -> Optional[Set[str]]:
+        """
+        :return: Ids of the experiments that changed after `since_version` or `None` if the whole grid search
+                 needs to be reloaded
+        """
+        with self._lock:
+            if self._full_reload_versions.get(grid_search_id, 0) > since_version:
+                return None
+            return {experiment_id for experiment_id, version in self._changed_experiments.get(grid_search_id, {}).items()
+                    if version > since_version}
+
+    def _mark_changed(self, grid_search_id: str, experiment_id: Optional[str]):
+        with self._lock:
+            self._version += 1
+            self._grid_search_versions[grid_search_id] = self._version
+            if experiment_id is None:
+                self._full_reload_versions[grid_search_id] = self._version
+            else:
+                self._changed_experiments.setdefault(grid_search_id, {})[experiment_id] = self._version
+
+    def _update_grid_search_ids(self):
+        grid_search_ids = LogDirWatcher._list_grid_search_ids(self.log_dir)
+        with self._lock:
+            self._grid_search_ids = grid_search_ids
+
+    @staticmethod
+    def _list_grid_search_ids(log_dir: str) -> List[str]:
+        # the log dir might not exist yet, e.g., while an analysis file is unpacked
+        if not os.path.isdir(log_dir):
+            return []
+        return LocalDataLoader.list_grid_search_ids(log_dir)
+
+    # inotify backend
+
+    def _watch_tree(self, inotify: Inotify, folder: str):
+        pending = [folder]
+        while pending:
+            folder = pending.pop()
+            self._watched_folders[inotify.add_watch(folder)] = folder
+            with os.scandir(folder) as entries:
+                pending.extend(entry.path for entry in entries
+                               if entry.is_dir() and entry.name not in LocalDataLoader.skipped_folder_names)
+
+    def _run_inotify(self, inotify: Inotify):
+        try:
+            while not self._stopped.is_set():
+                for wd, mask, name in inotify.read_events(timeout=1.0):
+                    self._handle_event(inotify, wd, mask, name)
+        except Exception as e:
+            logger.error(f"Watching {self.log_dir} failed ({e}).")
+        finally:
+            inotify.close()
+
+    def _handle_event(self, inotify: Inotify, wd: int, mask: int, name: str):
+        if mask & Inotify.IN_Q_OVERFLOW:
+            # events were lost, all grid searches need to be reloaded
+            self._update_grid_search_ids()
+            for grid_search_id in self.get_grid_search_ids():
+                self._mark_changed(grid_search_id, None)
+            return
+        folder = self._watched_folders.get(wd)
+        if folder is None:
+            return
+        if mask & Inotify.IN_IGNORED:
+            del self._watched_folders[wd]
+            return
+        path = os.path.join(folder, name) if name else folder
+        parts = os.path.relpath(path, self.log_dir).split(os.sep)
+        is_dir = bool(mask & (Inotify.IN_ISDIR | Inotify.IN_DELETE_SELF))
+        if is_dir and mask & (Inotify.IN_CREATE | Inotify.IN_MOVED_TO) and \
+                name not in LocalDataLoader.skipped_folder_names:
+            try:
+                self._watch_tree(inotify, path)
+            except OSError as e:
+                logger.warning(f"Cannot watch {path} ({e}).")
+        if parts[0] in (os.curdir, os.pardir):
+            return
+        if len(parts) == 1:
+            # a grid search was created or deleted
+            self._update_grid_search_ids()
+            self._mark_changed(parts[0], None)
+            return
+        if is_dir:
+            # new, moved or deleted (parts of) experiments
+            experiment_parts = parts[1:]
+        elif name in LocalDataLoader.fingerprinted_names:
+            experiment_parts = parts[1:-1]
+        elif len(parts) > 2 and parts[-2] == BinaryMetricsStore.folder_name:
+            experiment_parts = parts[1:-2]
+        else:
+            return
+        for index, part in enumerate(experiment_parts):
+            if part in LocalDataLoader.skipped_folder_names:
+                experiment_parts = experiment_parts[:index]
+                break
+        self._mark_changed(parts[0], os.path.join(*experiment_parts) if experiment_parts else None)
+
+    # polling backend
+
+    def _run_polling(self):
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self._poll()
+            except OSError as e:
+                logger.warning(f"Scanning {self.log_dir} failed ({e}).")
+
+    def _poll(self):
+        self._update_grid_search_ids()
+        grid_search_ids = self.get_grid_search_ids()
+        for grid_search_id in set(self._fingerprints) - set(grid_search_ids):
+            del self._fingerprints[grid_search_id]
+            self._mark_changed(grid_search_id, None)
+        for grid_search_id in grid_search_ids:
+            fingerprints = self._scan_grid_search(grid_search_id)
+            previous = self._fingerprints.get(grid_search_id)
+            self._fingerprints[grid_search_id] = fingerprints
+            if previous is None:
+                self._mark_changed(grid_search_id, None)
+                continue
+            for experiment_id in set(fingerprints) | set(previous):
+                if fingerprints.get(experiment_id) != previous.get(experiment_id):
+                    self._mark_changed(grid_search_id, experiment_id)
+
+    def _scan_grid_search(self, grid_search_id: str) -> Dict[str, Tuple]:
+        gs_path = os.path.join(self.log_dir, grid_search_id)
+        if ArchiveDataLoader.is_archive(gs_path):
+            # archives are only reloaded as a whole, hence the whole archive is a single "experiment"
+            stat = os.stat(gs_path)
+            return {os.curdir: (stat.st_mtime_ns, stat.st_size, stat.st_ino)}
+        _, _, fingerprints = LocalDataLoader._scan_experiment_folders(gs_path)
+        return fingerprints
@@ -0,0 +1,59 @@
+from typing import Dict, List, Iterable
+import numpy as np
+import pandas as pd
+from dashify.visualization.data_model.experiment import Experiment
+from dashify.visualization.data_model.ragged_array import RaggedArray
+
+
+class ColumnarGridSearchResult:
+    """
+    Column-oriented view of a grid search: the flattened configs are typed dataframe columns (one row per
+    experiment) and each metric is a `RaggedArray` across the experiments in the same order. Metrics are converted
+    on first access, such that lazily loaded experiments (see `LazyMetrics`) only read the series that are used.
+    Converted metrics are kept, unless any experiment is loaded lazily, whose series are bounded by `LazyMetrics.cache`.
+    """
+
+    def __init__(self, experiments: List[Experiment]):
+        self._experiments = list(experiments)
+        self.experiment_ids: List[str] = [experiment.identifier for experiment in self._experiments]
+        self._positions = {experiment_id: position for position, experiment_id in enumerate(self.experiment_ids)}
+        self.configs = pd.DataFrame([dict(experiment.flattened_config) for experiment in self._experiments],
+                                    index=range(len(self._experiments))).infer_objects()
+        self._metrics: Dict[str, RaggedArray] = {}
+        self._keeps_metrics = not any(experiment.has_lazy_metrics for experiment in self._experiments)
+
+    def __len__(self) -> int:
+        return len(self.experiment_ids)
+
+    def get_metric(self, metric_key: str) -> RaggedArray:
+        """
+        :return: Series of the metric for all experiments, empty for experiments that do not track it
+        """
+        if metric_key in self._metrics:
+            return self._metrics[metric_key]
+        ragged = RaggedArray.from_series(experiment.metrics.get(metric_key) for experiment in self._experiments)
+        if self._keeps_metrics:
+            self._metrics[metric_key] = ragged
+        return ragged
+
+    def get_positions(self, experiment_ids: Iterable[str]) -> np.ndarray:
+        """
+        :return: Row positions of the given experiments (unknown ids are ignored)
+        """
+        return np.array([self._positions[experiment_id] for experiment_id in experiment_ids
+                         if experiment_id in self._positions], dtype=np.int64)
+
+    def select(self, experiment_ids: Iterable[str]) -> "ColumnarGridSearchResult":
+        """
+        :return: Columnar result of the given experiments in the given order, already converted metrics are
+                 sliced instead of being converted again
+        """
+        positions = self.get_positions(experiment_ids)
+        selected = ColumnarGridSearchResult.__new__(ColumnarGridSearchResult)
+        selected._experiments = [self._experiments[position] for position in positions]
+        selected.experiment_ids = [self.experiment_ids[position] for position in positions]
+        selected._positions = {experiment_id: position for position, experiment_id in enumerate(selected.experiment_ids)}
+        selected.configs = self.configs.iloc[positions].reset_index(drop=True)
+        selected._metrics = {metric_key: ragged.take(positions) for metric_key, ragged in self._metrics.items()}
+        selected._keeps_metrics = self._keeps_metrics
+        return selected
@@ -1,20 +1,87 @@
-from typing import Dict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Dict, Any
+from dashify.logging.metrics_summary import MetricsSummary
+from dashify.visualization.data_model.lazy_metrics import LazyMetrics
 
 
 class Experiment:
-    def __init__(self, config:Dict, metrics: Dict[str, float], identifier: str):
-        self._config = config
-        self._metrics = metrics
+    """
+    Immutable experiment of a grid search. Config, metrics and summary are exposed as read-only views of the
+    loaded dictionaries, i.e., accessing them never copies any data.
+    """
+    __slots__ = ("_config", "_metrics", "_identifier", "_summary", "_flattened_config", "_has_lazy_metrics")
+
+    def __init__(self, config:Dict, metrics: Dict[str, float], identifier: str, summary: Dict[str, Dict[str, Any]] = None):
+        """
+        :param config: Config of the experiment
+        :param metrics: Dictionary mapping metric keys to their series, or `LazyMetrics` that load them on access
+        :param identifier: Experiment id
+        :param summary: Summary statistics of each metric (see `MetricsSummary`). Computed from the metrics if not given.
+        """
+        self._config = MappingProxyType(config)
+        self._metrics = MappingProxyType(metrics)
+        self._has_lazy_metrics = isinstance(metrics, LazyMetrics)
         self._identifier = identifier
+        if summary is None:
+            summary = MetricsSummary.from_metrics(metrics)
+        self._summary = MappingProxyType(summary)
+        self._flattened_config = None
+
+    @property
+    def config(self) -> Mapping:
+        return self._config
 
     @property
-    def config(self) -> Dict:
-        return self._config.copy()
+    def metrics(self) -> Mapping:
+        return self._metrics
 
     @property
-    def metrics(self) -> Dict[str, float]:
-        return self._metrics.copy()
+    def has_lazy_metrics(self) -> bool:
+        """
+        True if the series are read on access (see `LazyMetrics`), i.e., views of the experiment must not keep them
+        beyond the bounded `LazyMetrics.cache`.
+        """
+        return self._has_lazy_metrics
 
     @property
     def identifier(self) -> str:
         return self._identifier
+
+    @property
+    def summary(self) -> Mapping:
+        return self._summary
+
+    @property
+    def flattened_config(self) -> Mapping:
+        """
+        Config with nested keys joined by `/`, e.g., `{"model": {"lr": 0.1}}` becomes `{"model/lr": 0.1}`.
+        Flattened on first access only.
+        """
+        if self._flattened_config is None:
+            self._flattened_config = MappingProxyType(Experiment.flatten_dict(self._config))
+        return self._flattened_config
+
+    def get_aggregated_metric(self, metric_key: str, aggregation: str) -> Any:
+        """
+        Answers an aggregation (`min`, `mean`, `max`, `first`, `last`) of a metric from the summary.
+        Falls back to the series for metrics that cannot be summarized.
+        :return: aggregated value or `None` if the experiment does not track the metric
+        """
+        if metric_key not in self._summary:
+            return None
+        entry = self._summary[metric_key]
+        if entry is None:
+            return MetricsSummary.aggregate_series(self._metrics.get(metric_key), aggregation)
+        return MetricsSummary.aggregate(entry, aggregation)
+
+    @staticmethod
+    def flatten_dict(d: Mapping, parent_key: str = '', sep: str = '/') -> Dict:
+        items = []
+        for k, v in d.items():
+            new_key = parent_key + sep + k if parent_key else k
+            if isinstance(v, Mapping):
+                items.extend(Experiment.flatten_dict(v, new_key, sep=sep).items())
+            else:
+                items.append((new_key, v))
+        return dict(items)
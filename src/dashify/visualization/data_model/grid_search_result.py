@@ -1,10 +1,15 @@
 from dashify.visualization.data_model.experiment import Experiment
-from typing import List
-import collections
+from dashify.visualization.data_model.columnar_grid_search_result import ColumnarGridSearchResult
+from collections import Counter
+from typing import List, Dict, Tuple, Iterable, Hashable, Callable, Any
+import threading
 import pandas as pd
 
 
 class GridSearchResult:
+    # maximum number of memoized dataframes, e.g., for different metric selections
+    max_memoized = 16
+
     def __init__(self, gs_log_dir: str, experiments: List[Experiment] = None):
         """
         Dataclass for storing all the experiments of a grid search.
@@ -12,9 +17,35 @@ class GridSearchResult:
         :param experiments: List of experiments
         """
         self.gs_log_dir = gs_log_dir
-        if experiments is None:
-            experiments = []
-        self.experiments = experiments
+        self._experiments: List[Experiment] = []
+        # number of experiments that have each flattened config key / metric key
+        self._config_key_counts = Counter()
+        self._metric_key_counts = Counter()
+        # number of experiments whose series are loaded lazily (see `LazyMetrics`)
+        self._lazy_experiment_count = 0
+        # increased with every change of the experiments, invalidates the memoized dataframes
+        self.version = 0
+        self._memoized: Dict[Hashable, Any] = {}
+        # the dash callbacks access (and reload) the same grid search result from several threads
+        self._memoized_lock = threading.Lock()
+        # experiments that were skipped when loading, since their config or metrics file is missing
+        self.incomplete_experiment_ids: List[str] = []
+        # fingerprints of the experiments' files when they were loaded (experiment id -> fingerprint),
+        # see `LocalDataLoader.update_grid_search_results`
+        self.file_fingerprints: Dict[str, Tuple] = {}
+        if experiments is not None:
+            self.set_experiments(experiments)
+
+    @property
+    def experiments(self) -> List[Experiment]:
+        """
+        Experiments of the grid search. The list must not be modified, use `add_experiment` or `set_experiments`.
+        """
+        return self._experiments
+
+    @experiments.setter
+    def experiments(self, experiments: List[Experiment]):
+        self.set_experiments(experiments)
 
     def add_experiment(self, experiment: Experiment):
         """
@@ -22,7 +53,26 @@ class GridSearchResult:
         :param experiment: Experiment object
         :return: None
         """
-        self.experiments.append(experiment)
+        self._experiments.append(experiment)
+        self._count_keys([experiment], 1)
+        self._increase_version()
+
+    def set_experiments(self, experiments: Iterable[Experiment]):
+        """
+        Replaces the experiments, e.g., after (partially) reloading the grid search. Only the key counts of removed
+        and added experiments are updated. If the experiments are unchanged, the memoized dataframes stay valid.
+        :param experiments: New experiments, unchanged experiments are the same objects as before
+        """
+        experiments = list(experiments)
+        if len(experiments) == len(self._experiments) and \
+                all(new is old for new, old in zip(experiments, self._experiments)):
+            return
+        new_ids = {id(experiment) for experiment in experiments}
+        old_ids = {id(experiment) for experiment in self._experiments}
+        self._count_keys([experiment for experiment in self._experiments if id(experiment) not in new_ids], -1)
+        self._count_keys([experiment for experiment in experiments if id(experiment) not in old_ids], 1)
+        self._experiments = experiments
+        self._increase_version()
 
     def get_experiment_ids(self) -> List[str]:
         """
@@ -36,47 +86,104 @@ class GridSearchResult:
         Returns a list of all flattened config keys present in the grid search
         :return: List of flattened config keys
         """
-        flattened_config_keys = []
-        for experiment in self.experiments:
-            keys = list(GridSearchResult._flatten_dict(experiment.config).keys())
-            flattened_config_keys = flattened_config_keys + keys
-        return list(set(flattened_config_keys))
+        return list(self._config_key_counts)
 
     def get_experiment_metrics(self) -> List[str]:
         """
         Returns a list of all metric keys present in the grid search
         :return: List of metric keys
         """
-        metrics_keys = []
-        for experiment in self.experiments:
-            keys = list(experiment.metrics.keys())
-            metrics_keys = metrics_keys + keys
-        return list(set(metrics_keys))
+        return list(self._metric_key_counts)
 
-    def to_pandas_dataframe(self) -> pd.DataFrame:
+    def to_pandas_dataframe(self, metric_keys: List[str] = None) -> pd.DataFrame:
+        """
+        Creates a dataframe with the flattened configs, the metric series and the experiment_id column.
+        :param metric_keys: If given, only these metrics are added, such that lazily loaded experiments
+                            (see `LazyMetrics`) only read the series that are needed
+        :return: dataframe with one row per experiment, built once per version of the grid search (on each call,
+                 if series are loaded lazily)
+        """
+        key = ("pandas", None if metric_keys is None else tuple(metric_keys))
+        if self._lazy_experiment_count > 0 and metric_keys != []:
+            # the dataframe would keep the series in memory beyond the bounded `LazyMetrics.cache`
+            return self._build_pandas_dataframe(metric_keys)
+        return self._memoize(key, lambda: self._build_pandas_dataframe(metric_keys)).copy(deep=False)
+
+    def _build_pandas_dataframe(self, metric_keys: List[str] = None) -> pd.DataFrame:
         metrics = []
         configs = []
         experiment_ids = []
         for experiment in self.experiments:
-            metrics.append(GridSearchResult._flatten_dict(experiment.metrics))
-            configs.append(GridSearchResult._flatten_dict(experiment.config))
+            experiment_metrics = experiment.metrics
+            if metric_keys is not None:
+                experiment_metrics = {key: experiment_metrics[key] for key in metric_keys if key in experiment_metrics}
+            metrics.append(GridSearchResult._flatten_dict(experiment_metrics))
+            configs.append(dict(experiment.flattened_config))
             experiment_ids.append({"experiment_id": experiment.identifier})
         df = pd.concat([pd.DataFrame(configs), pd.DataFrame(metrics), pd.DataFrame(experiment_ids)], axis=1)
         return df
 
-    @staticmethod
-    def _flatten_dict(d, parent_key='', sep='/'):
-        items = []
-        for k, v in d.items():
-            new_key = parent_key + sep + k if parent_key else k
-            if isinstance(v, collections.MutableMapping):
-                items.extend(GridSearchResult._flatten_dict(v, new_key, sep=sep).items())
-            else:
-                items.append((new_key, v))
-        return dict(items)
+    def to_columnar(self) -> ColumnarGridSearchResult:
+        """
+        Creates a column-oriented view with typed config columns and one `RaggedArray` per metric, which
+        avoids Python lists in dataframe cells. Built once per version of the grid search, metrics of lazily loaded
+        experiments are converted on each access (see `ColumnarGridSearchResult`).
+        """
+        return self._memoize(("columnar",), lambda: ColumnarGridSearchResult(self.experiments))
 
+    def to_summary_dataframe(self, aggregations: Dict[str, str]) -> pd.DataFrame:
+        """
+        Creates a dataframe with the flattened configs and one aggregated value per metric and experiment.
+        The aggregated values are answered from the experiments' summaries, i.e., without touching the full series.
+        :param aggregations: Dictionary mapping metric keys to an aggregation (`min`, `mean`, `max`, `first`, `last`)
+        :return: dataframe with config columns, the aggregated metric columns and the experiment_id column
+        """
+        key = ("summary", tuple(aggregations.items()))
+        return self._memoize(key, lambda: self._build_summary_dataframe(aggregations)).copy(deep=False)
 
+    def _build_summary_dataframe(self, aggregations: Dict[str, str]) -> pd.DataFrame:
+        metrics = []
+        configs = []
+        experiment_ids = []
+        for experiment in self.experiments:
+            metrics.append({metric_key: experiment.get_aggregated_metric(metric_key, aggregation)
+                            for metric_key, aggregation in aggregations.items() if metric_key in experiment.summary})
+            configs.append(dict(experiment.flattened_config))
+            experiment_ids.append({"experiment_id": experiment.identifier})
+        df = pd.concat([pd.DataFrame(configs), pd.DataFrame(metrics), pd.DataFrame(experiment_ids)], axis=1)
+        return df
 
+    def _memoize(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._memoized_lock:
+            if key in self._memoized:
+                return self._memoized[key]
+            version = self.version
+        # building happens without holding the lock, such that different dataframes can be built concurrently
+        value = build()
+        with self._memoized_lock:
+            # a value built from experiments that were replaced in the meantime is returned, but not memoized
+            if self.version == version:
+                if key not in self._memoized and len(self._memoized) >= GridSearchResult.max_memoized:
+                    self._memoized.pop(next(iter(self._memoized)))
+                self._memoized[key] = value
+        return value
 
+    def _increase_version(self):
+        with self._memoized_lock:
+            self.version += 1
+            self._memoized.clear()
 
+    def _count_keys(self, experiments: List[Experiment], increment: int):
+        for experiment in experiments:
+            if experiment.has_lazy_metrics:
+                self._lazy_experiment_count += increment
+            for counts, keys in ((self._config_key_counts, experiment.flattened_config),
+                                 (self._metric_key_counts, experiment.metrics)):
+                for key in keys:
+                    counts[key] += increment
+                    if counts[key] <= 0:
+                        del counts[key]
 
+    @staticmethod
+    def _flatten_dict(d, parent_key='', sep='/'):
+        return Experiment.flatten_dict(d, parent_key, sep)
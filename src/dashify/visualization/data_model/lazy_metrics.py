@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, List, Hashable
+import itertools
+import threading
+
+
+class SeriesCache:
+    """
+    Thread-safe LRU cache of metric series that holds at most `max_entries` series.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value of `key` or loads, caches and returns it. The least recently used entries are evicted.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        # loading happens without holding the lock, such that different series can be loaded concurrently
+        value = load()
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LazyMetrics(Mapping):
+    """
+    Read-only metrics dictionary of an experiment that knows its metric keys, but reads each series only when
+    it is accessed. Loaded series are kept in the `SeriesCache` shared by all lazy experiments, which bounds the
+    number of series in memory.
+    """
+    cache = SeriesCache()
+    _tokens = itertools.count()
+
+    def __init__(self, metric_keys: List[str], load_series: Callable[[str], Any],
+                 load_all_series: Callable[[], Dict[str, Any]] = None):
+        """
+        :param metric_keys: Keys of the experiment's metrics
+        :param load_series: Function mapping a metric key to its series
+        :param load_all_series: If given, it is used instead of `load_series` and all loaded series are cached,
+                                e.g., if reading a single series requires parsing all of them anyway
+        """
+        self._metric_keys = list(metric_keys)
+        self._key_set = set(metric_keys)
+        self._load_series = load_series
+        self._load_all_series = load_all_series
+        # identifies the series of this object in the shared cache, i.e., reloaded experiments never see stale series
+        self._token = next(LazyMetrics._tokens)
+
+    def __getitem__(self, metric_key: str) -> Any:
+        if metric_key not in self._key_set:
+            raise KeyError(metric_key)
+        return LazyMetrics.cache.get((self._token, metric_key), lambda: self._load(metric_key))
+
+    def _load(self, metric_key: str) -> Any:
+        if self._load_all_series is None:
+            return self._load_series(metric_key)
+        all_series = self._load_all_series()
+        for key, series in all_series.items():
+            if key != metric_key and key in self._key_set:
+                LazyMetrics.cache.put((self._token, key), series)
+        return all_series[metric_key]
+
+    def __contains__(self, metric_key: object) -> bool:
+        return metric_key in self._key_set
+
+    def __iter__(self):
+        return iter(self._metric_keys)
+
+    def __len__(self) -> int:
+        return len(self._metric_keys)
+
+    def copy(self) -> "LazyMetrics":
+        # immutable, hence sharing is safe
+        return self
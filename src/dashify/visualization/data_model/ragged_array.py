@@ -0,0 +1,101 @@
+from typing import List, Any, Iterable, Tuple
+import numpy as np
+
+
+class RaggedArray:
+    """
+    Columnar store of series with different lengths, e.g., the series of one metric across all experiments.
+    All values are kept in a single contiguous float64 array and series `i` is `values[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, values: np.ndarray, offsets: np.ndarray):
+        """
+        :param values: Concatenated values of all series
+        :param offsets: Start of each series in `values` followed by the total number of values
+        """
+        self.values = values
+        self.offsets = offsets
+
+    @staticmethod
+    def from_series(series: Iterable[Any]) -> "RaggedArray":
+        """
+        Builds a ragged array from lists or numpy arrays. Anything else, e.g., missing or non-numeric metrics,
+        becomes an empty series.
+        """
+        arrays = [RaggedArray._to_array(values) for values in series]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(array) for array in arrays], out=offsets[1:])
+        values = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.float64)
+        return RaggedArray(values, offsets)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @property
+    def max_length(self) -> int:
+        return int(self.lengths.max()) if len(self) else 0
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """
+        :return: View of the values of a single series
+        """
+        if index < 0:
+            index += len(self)
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def take(self, indices: Iterable[int]) -> "RaggedArray":
+        """
+        :return: Ragged array of the selected series in the given order
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = self.lengths[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # position of each selected value in `self.values`
+        positions = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - self.offsets[indices], lengths)
+        return RaggedArray(self.values[positions], offsets)
+
+    def to_padded(self, fill_value: float = np.nan, length: int = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Creates a matrix with one row per series, padded at the end.
+        :param fill_value: Value of the padded entries
+        :param length: Number of columns, defaults to the length of the longest series. Longer series are cut.
+        :return: (matrix, mask) where `mask` is True for entries that hold a value of a series
+        """
+        lengths = self.lengths
+        if length is None:
+            length = self.max_length
+        rows = np.repeat(np.arange(len(self)), lengths)
+        columns = np.arange(len(self.values)) - np.repeat(self.offsets[:-1], lengths)
+        if length < self.max_length:
+            kept = columns < length
+            rows, columns, values = rows[kept], columns[kept], self.values[kept]
+        else:
+            values = self.values
+        matrix = np.full((len(self), length), fill_value, dtype=np.float64)
+        mask = np.zeros((len(self), length), dtype=bool)
+        matrix[rows, columns] = values
+        mask[rows, columns] = True
+        return matrix, mask
+
+    def to_list(self) -> List[List[float]]:
+        return [series.tolist() for series in self]
+
+    @staticmethod
+    def _to_array(values: Any) -> np.ndarray:
+        if isinstance(values, (list, tuple, np.ndarray)):
+            try:
+                array = np.asarray(values, dtype=np.float64)
+                if array.ndim == 1:
+                    return array
+            except (TypeError, ValueError):
+                pass
+        return np.empty(0, dtype=np.float64)
@@ -0,0 +1,123 @@
+from typing import List, Tuple
+import warnings
+import numpy as np
+
+
+class Downsampler:
+    """
+    Reduces the number of points of each trace before a figure is sent to the browser. Traces with the same length
+    are downsampled together, i.e., the work per bucket is vectorized across traces.
+
+    Methods:
+    - `lttb`: largest-triangle-three-buckets, keeps the visual shape including peaks
+    - `min_max`: the minimum and maximum of each bucket and the first and last point, keeps the full value range
+    """
+    supported_methods = ["lttb", "min_max"]
+    # default number of points per trace (None or 0: no downsampling) and default method
+    target_points: int = 2000
+    method: str = "lttb"
+
+    @staticmethod
+    def get_indices(series: List[np.ndarray], target_points: int = None, method: str = None) -> List[np.ndarray]:
+        """
+        Selects the points that are kept of each series.
+        :param series: Series of arbitrary lengths
+        :param target_points: Maximum number of points per series, defaults to `Downsampler.target_points`
+        :param method: One of `supported_methods`, defaults to `Downsampler.method`
+        :return: Sorted indices of the kept points of each series
+        """
+        target_points = Downsampler.target_points if target_points is None else target_points
+        method = Downsampler.method if method is None else method
+        if method not in Downsampler.supported_methods:
+            raise Exception(f"Unknown downsampling method {method}, supported methods: {Downsampler.supported_methods}")
+        indices = [np.arange(len(values)) for values in series]
+        if not target_points:
+            return indices
+        lengths = np.array([len(values) for values in series], dtype=np.int64)
+        for length in np.unique(lengths[lengths > max(target_points, 2)]):
+            rows = np.flatnonzero(lengths == length)
+            matrix = np.array([series[row] for row in rows], dtype=np.float64)
+            if method == "lttb":
+                selected = Downsampler._lttb(matrix, target_points)
+            else:
+                selected = Downsampler._min_max(matrix, target_points)
+            for row, row_indices in zip(rows, selected):
+                # min_max selects a single point twice if it is minimum and maximum of its bucket
+                indices[row] = np.unique(row_indices)
+        return indices
+
+    @staticmethod
+    def downsample_band(center: np.ndarray, lower: np.ndarray, upper: np.ndarray, target_points: int = None,
+                        method: str = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Downsamples a band such that its envelope is kept: the points are selected on the center line and each kept
+        point takes the minimum of the lower bound and the maximum of the upper bound of the steps it represents.
+        :return: (x, center, lower, upper) of the kept points
+        """
+        indices = Downsampler.get_indices([center], target_points, method)[0]
+        if len(indices) == len(center):
+            return indices, center, lower, upper
+        # each kept point represents the steps up to the midpoint to its neighbours
+        starts = np.concatenate([[0], (indices[:-1] + indices[1:] + 1) // 2])
+        return indices, center[indices], np.fmin.reduceat(lower, starts), np.fmax.reduceat(upper, starts)
+
+    @staticmethod
+    def _lttb(matrix: np.ndarray, target_points: int) -> np.ndarray:
+        """
+        :param matrix: One series per row, all of the same length
+        :return: Indices of the kept points, one row per series
+        """
+        n_series, length = matrix.shape
+        target_points = max(target_points, 3)
+        # NaNs never form the largest triangle, unless the whole bucket is NaN
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)  # series without any value
+            finite = np.where(np.isnan(matrix), np.nanmean(matrix, axis=1, keepdims=True), matrix)
+        finite = np.nan_to_num(finite)
+        # the first and last points are always kept, the others are split into equally sized buckets
+        edges = np.floor(np.arange(target_points - 1) * (length - 2) / (target_points - 2)).astype(np.int64) + 1
+        cumulative = np.zeros((n_series, length + 1))
+        np.cumsum(finite, axis=1, out=cumulative[:, 1:])
+        selected = np.empty((n_series, target_points), dtype=np.int64)
+        selected[:, 0] = 0
+        selected[:, -1] = length - 1
+        rows = np.arange(n_series)
+        previous = np.zeros(n_series, dtype=np.int64)
+        for bucket in range(target_points - 2):
+            start, end = edges[bucket], edges[bucket + 1]
+            # average of the next bucket (the last point for the last bucket)
+            next_start = end
+            next_end = edges[bucket + 2] if bucket + 2 < len(edges) else length
+            next_x = (next_start + next_end - 1) / 2
+            next_y = (cumulative[:, next_end] - cumulative[:, next_start]) / (next_end - next_start)
+            previous_y = finite[rows, previous]
+            x = np.arange(start, end)
+            areas = np.abs((previous[:, None] - next_x) * (finite[:, start:end] - previous_y[:, None]) -
+                           (previous[:, None] - x) * (next_y - previous_y)[:, None])
+            previous = start + np.argmax(areas, axis=1)
+            selected[:, bucket + 1] = previous
+        return selected
+
+    @staticmethod
+    def _min_max(matrix: np.ndarray, target_points: int) -> np.ndarray:
+        """
+        :param matrix: One series per row, all of the same length
+        :return: Indices of the kept points, one row per series
+        """
+        n_series, length = matrix.shape
+        n_buckets = max(target_points // 2, 1)
+        bucket_size = int(np.ceil(length / n_buckets))
+        n_buckets = int(np.ceil(length / bucket_size))
+        padded_length = n_buckets * bucket_size
+        # padding and NaNs are neither minimum nor maximum
+        for_min = np.full((n_series, padded_length), np.inf)
+        for_max = np.full((n_series, padded_length), -np.inf)
+        for_min[:, :length] = np.where(np.isnan(matrix), np.inf, matrix)
+        for_max[:, :length] = np.where(np.isnan(matrix), -np.inf, matrix)
+        offsets = np.arange(n_buckets) * bucket_size
+        minima = offsets + np.argmin(for_min.reshape(n_series, n_buckets, bucket_size), axis=2)
+        maxima = offsets + np.argmax(for_max.reshape(n_series, n_buckets, bucket_size), axis=2)
+        # the first and last points are kept, such that the trace spans all steps
+        endpoints = np.tile([0, length - 1], (n_series, 1))
+        selected = np.sort(np.concatenate([endpoints, minima, maxima], axis=1), axis=1)
+        return np.minimum(selected, length - 1)
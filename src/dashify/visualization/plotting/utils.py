@@ -1,9 +1,12 @@
 import numpy as np
 import plotly.graph_objs as go
 import dash_core_components as dcc
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
 from functools import reduce
 import seaborn as sns
+from dashify.visualization.data_model.ragged_array import RaggedArray
+from dashify.aggregation.band_statistics import BandStatistics
+from dashify.visualization.plotting.downsampling import Downsampler
 
 def get_rgb_colors(n_colors):
     color_palette = sns.color_palette("Set1", n_colors)
@@ -26,12 +29,17 @@ def make_transparent(color, transparency):
     return color
 
 
-def get_std_figure(title, data_groups):
+def get_std_figure(title, data_groups, band_type: str = "std", min_count: int = 1):
     def get_band_traces(name, data, color):
         # calculate bounds
-        mean_data, ucb_data, lcb_data = get_deviations(data)
-
-        x = np.arange(mean_data.shape[0])
+        mean_data, lcb_data, ucb_data, counts = BandStatistics.compute(data, band_type)
+        if min_count > 1:
+            # the band is truncated at steps to which only a few series contribute, they are not representative
+            lcb_data = np.where(counts >= min_count, lcb_data, np.nan)
+            ucb_data = np.where(counts >= min_count, ucb_data, np.nan)
+        # only the plotted points are reduced, the band keeps its envelope
+        x, mean_data, lcb_data, ucb_data = Downsampler.downsample_band(mean_data, lcb_data, ucb_data)
+        counts = counts[x]
         upper_bound = go.Scatter(
             name=name,
             x=x,
@@ -47,6 +55,8 @@ def get_std_figure(title, data_groups):
             name=name,
             x=x,
             y=mean_data,
+            customdata=counts,
+            hovertemplate="%{y}<br>series: %{customdata}",
             mode='lines',
             line=dict(color=color),
             fillcolor=make_transparent(color, transparency=0.5),
@@ -91,36 +101,25 @@ def get_std_figure(title, data_groups):
     return fig
 
 
-def get_deviations(series: List):
-    max_len = reduce(lambda x, y: max(x, len(y)), series, 0)
-    n_series = len(series)
-
-    mean_series = np.zeros(max_len)
-    std_series = np.zeros(max_len)
-    for seq_ix in range(max_len):
-        series_at_ix = []
-        for series_ix in range(n_series):
-            try:
-                data_point = series[series_ix][seq_ix]
-                series_at_ix.append(data_point)
-            except:
-                pass
-
-        # compute mean and std
-        mean, sd = np.mean(series_at_ix), np.std(series_at_ix)
-        mean_series[seq_ix] = mean
-        std_series[seq_ix] = sd
-
-    return mean_series, mean_series-std_series, mean_series + std_series
+def get_deviations(series: Union[List, RaggedArray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes mean and standard deviation of the series at each step, see `BandStatistics.compute`.
+    :param series: List of series of different lengths or a `RaggedArray`
+    :return: mean, mean - std, mean + std and the number of contributing series at each step
+    """
+    return BandStatistics.compute(series, "std")
 
 
 def get_line_graph(id, series: List[Dict], title) -> dcc.Graph:
-    def create_one_series(name, data) -> Dict:
-        series = {"x": list(range(len(data))), 'y': data, 'type': 'linear', 'name': name}
+    def create_one_series(name, x, y) -> Dict:
+        series = {"x": x, 'y': y, 'type': 'linear', 'name': name}
         return series
 
     def get_series_data(series) -> List:
-        return [create_one_series(exp["experiment_id"], exp["data"]) for exp in series]
+        # series with many steps are downsampled, see `Downsampler`
+        values = [np.asarray(exp["data"], dtype=np.float64) for exp in series]
+        indices = Downsampler.get_indices(values)
+        return [create_one_series(exp["experiment_id"], x, y[x]) for exp, x, y in zip(series, indices, values)]
 
     graph = dcc.Graph(
         id=id,
@@ -134,9 +133,13 @@ def get_line_graph(id, series: List[Dict], title) -> dcc.Graph:
     return graph
 
 
-def get_band_graph(id, series_groups: Dict, title) -> dcc.Graph:
+def get_band_graph(id, series_groups: Dict, title, band_type: str = "std", min_count: int = 1) -> dcc.Graph:
+    """
+    :param band_type: See `BandStatistics`
+    :param min_count: The band is hidden at steps where fewer series contribute
+    """
     band_graph = dcc.Graph(
         id=id,
-        figure=get_std_figure(title, series_groups)
+        figure=get_std_figure(title, series_groups, band_type, min_count)
     )
     return band_graph
\ No newline at end of file
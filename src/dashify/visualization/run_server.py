@@ -2,6 +2,10 @@ import argparse
 from dashify.visualization.app import app
 from dashify.visualization.layout_definition import get_layout
 from dashify.visualization.data_export.analysis_file import AnalysisExporter
+from dashify.visualization.data_import.data_loaders import LocalDataLoader
+from dashify.visualization.data_model.lazy_metrics import LazyMetrics
+from dashify.visualization.controllers.cache_controller import cache_controller
+from dashify.visualization.plotting.downsampling import Downsampler
 import uuid
 
 def parse_args():
@@ -9,7 +13,34 @@ def parse_args():
     parser.add_argument('--logdir', type=str, help='Path tho the grid search root directory')
     parser.add_argument('--analysis_file', type=str, help='Path to the dashify analysis file (analysis.json)')
     parser.add_argument('--port', type=int, help='Port on which runs the webserver', default=8888)
+    parser.add_argument('--num_workers', type=int, help='Number of experiments that are loaded concurrently', default=None)
+    parser.add_argument('--loader', type=str, choices=['thread', 'process'], default='thread',
+                        help='Load experiments with threads (I/O bound) or processes (large metrics files)')
+    parser.add_argument('--no_index', action='store_true',
+                        help='Do not use (and update) the persistent index file of each grid search')
+    parser.add_argument('--lazy', action='store_true',
+                        help='Load metric series only when they are plotted instead of at startup')
+    parser.add_argument('--series_cache_size', type=int, default=1000,
+                        help='Maximum number of lazily loaded metric series kept in memory')
+    parser.add_argument('--no_watch', action='store_true',
+                        help='Do not watch the log dir for changes, i.e., graphs are only refreshed on interaction')
+    parser.add_argument('--refresh_interval', type=float, default=60,
+                        help='Seconds between two refreshes of the graphs while the log dir is watched, each '
+                             'refresh that finds changes rebuilds all graphs')
+    parser.add_argument('--max_points_per_trace', type=int, default=2000,
+                        help='Traces with more points are downsampled before plotting (0: plot all points)')
+    parser.add_argument('--downsampling', type=str, choices=Downsampler.supported_methods, default='lttb',
+                        help='Downsampling method: largest-triangle-three-buckets or min/max per bucket')
     args = parser.parse_args()
+    cache_controller.watch_log_dir = not args.no_watch
+    cache_controller.refresh_seconds = args.refresh_interval
+    LocalDataLoader.use_index = not args.no_index
+    LocalDataLoader.lazy = args.lazy
+    LazyMetrics.cache.max_entries = args.series_cache_size
+    LocalDataLoader.num_workers = args.num_workers
+    LocalDataLoader.executor = args.loader
+    Downsampler.target_points = args.max_points_per_trace
+    Downsampler.method = args.downsampling
     gs_log_dir = args.logdir
     port = args.port
     analysis_file = args.analysis_file
@@ -6,13 +6,16 @@ from functools import reduce
 from dashify.visualization.app import app
 import dash_core_components as dcc
 from dash.dependencies import Input, Output
-from dashify.visualization.controllers.data_controllers import GraphController, MetricsController, ExperimentController
+from dash import callback_context, no_update
+from dashify.visualization.controllers.data_controllers import GraphController, MetricsController, ExperimentController, \
+    GridSearchController
 from dashify.visualization.plotting.utils import generate_marks, get_band_graph, get_line_graph
 import multiprocessing as mp
 from itertools import repeat
 from dashify.visualization import layout_definition
 from flask import url_for
 from dashify.metrics.processor import MetricDataProcessor
+from dashify.aggregation.aggregator import DataAggregator
 import flask
 
 def render_graphs(session_id: str):
@@ -22,9 +25,11 @@ def render_graphs(session_id: str):
     graph_content = html.Div(children=create_grids(session_id, graph_groups), id="graph-content")
 
     # other layout elements
+    # checking for changes is cheap if the log dir is watched, otherwise each tick rescans the grid search
+    refresh_seconds = GridSearchController.get_refresh_seconds() if GridSearchController.is_watching_log_dir() else 1000
     interval = dcc.Interval(
         id='graph-interval-component',
-        interval=1000 * 1000,  # in milliseconds
+        interval=refresh_seconds * 1000,  # in milliseconds
         n_intervals=0
     )
 
@@ -41,6 +46,25 @@ def render_graphs(session_id: str):
                 step=1e-2,
                 marks=generate_marks(0, 1, 0.2),
             )], style={"width": "30%"}
+        ),
+        html.P("Smoothing kernel"),
+        html.Div(
+            children=[dcc.Dropdown(
+                id="smoothing-kernel-dropdown",
+                options=[{"label": kernel, "value": kernel} for kernel in DataAggregator.supported_kernels],
+                value=GraphController.get_smoothing_kernel(session_id),
+                clearable=False,
+            )], style={"width": "30%"}
+        ),
+        html.P("Minimum number of series per band step"),
+        html.Div(
+            children=[dcc.Input(
+                id="min-band-series-input",
+                type="number",
+                min=1,
+                step=1,
+                value=GraphController.get_min_band_series(session_id),
+            )], style={"width": "30%"}
         )
     ]
 
@@ -133,17 +157,30 @@ def create_graph_with_line_plot(session_id: str, metric_tag: str) -> dcc.Graph:
 
 def create_graph_with_bands(session_id: str, metric_tag: str) -> dcc.Graph:
     data_groups = MetricDataProcessor.get_aggregated_data(session_id, metric_tag)
-    band_graph = get_band_graph(id=metric_tag, series_groups=data_groups, title=metric_tag)
+    band_type = MetricsController.get_band_type(session_id, metric_tag)
+    min_count = GraphController.get_min_band_series(session_id)
+    band_graph = get_band_graph(id=metric_tag, series_groups=data_groups, title=metric_tag, band_type=band_type,
+                                min_count=min_count)
     return band_graph
 
 
 @app.callback(
     Output('graph-content', "children"),
     [Input("session-id", "children"), Input('smoothing-slider', 'value'),
+     Input('smoothing-kernel-dropdown', 'value'), Input('min-band-series-input', 'value'),
      Input('graph-interval-component', 'n_intervals')]
 )
-def settings_callback(session_id, smoothing, interval):
+def settings_callback(session_id, smoothing, smoothing_kernel, min_band_series, interval):
+    triggered_by_interval = any(trigger["prop_id"].startswith("graph-interval-component")
+                                for trigger in callback_context.triggered)
+    if triggered_by_interval and not ExperimentController.has_changes(session_id):
+        # nothing changed on disk, the graphs stay as they are
+        return no_update
     GraphController.set_smoothing_factor(session_id, smoothing)
+    GraphController.set_smoothing_kernel(session_id, smoothing_kernel)
+    # the input is empty while the user is typing
+    if min_band_series is not None:
+        GraphController.set_min_band_series(session_id, int(min_band_series))
     graphs = create_graphs(session_id)
     graph_groups = create_graph_groups(graphs)
     return create_grids(session_id, graph_groups)
\ No newline at end of file
@@ -1,6 +1,7 @@
 import dash_html_components as html
 import dash_core_components as dcc
 from dashify.visualization.controllers.data_controllers import MetricsController, ConfigController, GridSearchController
+from dashify.aggregation.band_statistics import BandStatistics
 import dash_table
 from dash.dependencies import Input, Output
 from dashify.visualization.app import app
@@ -60,6 +61,7 @@ def create_metrics_settings_table(session_id: str):
                 {'id': 'Selected', 'name': 'Selected', 'presentation': 'dropdown'},
                 {'id': 'Aggregation', 'name': 'Aggregation', 'presentation': 'dropdown'},
                 {'id': 'Std_band', 'name': 'Std_band', 'presentation': 'dropdown'},
+                {'id': 'Band_type', 'name': 'Band_type', 'presentation': 'dropdown'},
                 {'id': 'Grouping parameter 1', 'name': 'Grouping parameter 1', 'presentation': 'dropdown'},
                 {'id': 'Grouping parameter 2', 'name': 'Grouping parameter 2', 'presentation': 'dropdown'},
             ],
@@ -83,6 +85,12 @@ def create_metrics_settings_table(session_id: str):
                         for i in ["y", "n"]
                     ]
                 },
+                'Band_type': {
+                    'options': [
+                        {'label': i, 'value': i}
+                        for i in BandStatistics.supported_band_types
+                    ]
+                },
                 'Grouping parameter 1': {
                     'options': [
                         {'label': i, 'value': i}